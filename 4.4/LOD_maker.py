@@ -1,72 +1,1670 @@
 bl_info = {
     "name": "SM2 LOD Duplicator",
     "author": "violet :3",
-    "version": (1, 4),
+    "version": (1, 11),
     "blender": (4, 4, 0),
     "location": "View3D > Sidebar > SM2 Tools",
-    "description": "Create LODs by duplicating objects, preserving armature modifiers, and applying decimate modifiers",
+    "description": "Create LODs by duplicating objects, preserving armature modifiers, and decimating with Blender's Decimate modifier or the built-in quadric simplifier",
     "category": "SM2 Tools",
 }
 
 import bpy
+import bmesh
+import collections
+import csv
+import hashlib
+import json
+import math
+import os
 import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from mathutils.bvhtree import BVHTree
+import numpy as np
+
+MAX_LODS = 8
+
+# Seconds a background simplify worker may run before it is killed
+WORKER_TIMEOUT = 30 * 60
+
+# Post-transform vertex cache size used for ordering and ACMR
+VERTEX_CACHE_SIZE = 32
+
+# Extra cost for open boundaries, material borders and bone weight borders,
+# relative to the plain surface error
+FEATURE_EDGE_WEIGHT = 100.0
+# Reject a collapse if it turns a triangle further than this (cosine)
+FLIP_COS_LIMIT = 0.2
+# Collapses per round are ranked within this many cost bands, in random
+# order inside a band so independent collapses spread over the surface
+COST_BANDS = 16
+
+# Custom properties used to recognise up to date LODs on re-runs, kept out of exports
+LOD_HASH_KEY = "sm2_lod_hash"
+LOD_LEVEL_KEY = "sm2_lod_level"
+LOD_STATE_KEYS = {LOD_HASH_KEY, LOD_LEVEL_KEY}
+# LOD settings (JSON) on proxy LODs that still share the source mesh
+LOD_PROXY_KEY = "sm2_lod_proxy"
+
+# Switch distances written for the engine (exported as glTF extras)
+LOD_DISTANCE_KEY = "sm2_lod_distance"
+LOD_SCREEN_SIZE_KEY = "sm2_lod_screen_size"
+LOD_DISTANCES_KEY = "sm2_lod_distances"
+LOD_RADIUS_KEY = "sm2_bounding_radius"
+
+# Everything this tool writes itself, never hashed or synced from a source
+LOD_OWN_KEYS = LOD_STATE_KEYS | {LOD_PROXY_KEY, LOD_DISTANCE_KEY, LOD_SCREEN_SIZE_KEY, LOD_DISTANCES_KEY, LOD_RADIUS_KEY, '_RNA_UI'}
+
+SIMPLIFY_OPTION_KEYS = ("preserve_uv_seams", "preserve_materials", "respect_weights")
 
 def clean_blender_suffix(name):
     # Only strip Blender's .001/.002 suffixes, not custom _01/_02 suffixes
     return re.sub(r'\.\d+$', '', name)
 
+def parse_triangle_budgets(text, base_tris, lod_count, ratio):
+    # "20000, 8000" -> explicit budgets, missing levels continue with the ratio
+    budgets = []
+    for part in text.replace(';', ',').split(','):
+        part = part.strip()
+        if part:
+            budgets.append(max(1, int(float(part))))
+    budgets = budgets[:lod_count]
+
+    last = budgets[-1] if budgets else base_tris
+    while len(budgets) < lod_count:
+        last = max(1, int(last * ratio))
+        budgets.append(last)
+    return budgets
+
+# ------------------ Mesh arrays ------------------
+
+def read_mesh_geometry(mesh):
+    # Positions and triangle indices only
+    mesh.calc_loop_triangles()
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    return co.reshape(-1, 3), tris.reshape(-1, 3)
+
+WEIGHT_DTYPE = np.dtype([("vert", np.int32), ("group", np.int32), ("value", np.float32)])
+
+def read_vertex_weights(mesh):
+    """(vertex, group, weight) rows of a mesh's bone weights.
+
+    Deform weights have no foreach_get, one flat generator into np.fromiter
+    is the cheapest way through them.
+    """
+    rows = ((v.index, g.group, g.weight) for v in mesh.vertices for g in v.groups)
+    return np.fromiter(rows, dtype=WEIGHT_DTYPE)
+
+def read_mesh_arrays(mesh, vertex_groups=True):
+    """Read a mesh into flat NumPy arrays with foreach_get (triangulated).
+
+    Bone weights are skipped when the object has no vertex groups to keep them in.
+    """
+    co, tris = read_mesh_geometry(mesh)
+    n_tris = len(tris)
+
+    tri_loops = np.empty(n_tris * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", tri_loops)
+    tri_mat = np.empty(n_tris, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("material_index", tri_mat)
+    tri_poly = np.empty(n_tris, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("polygon_index", tri_poly)
+
+    poly_smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", poly_smooth)
+
+    # UVs are stored per triangle corner, all layers side by side
+    corner_uv = np.empty((n_tris * 3, 2 * len(mesh.uv_layers)), dtype=np.float32)
+    for i, layer in enumerate(mesh.uv_layers):
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uv)
+        corner_uv[:, 2 * i:2 * i + 2] = uv.reshape(-1, 2)[tri_loops]
+
+    weights = read_vertex_weights(mesh) if vertex_groups else np.empty(0, dtype=WEIGHT_DTYPE)
+
+    return {
+        "co": co,
+        "tris": tris,
+        "corner_uv": corner_uv.reshape(n_tris, 3, corner_uv.shape[1]),
+        "tri_mat": tri_mat,
+        "tri_smooth": poly_smooth[tri_poly],
+        "weight_vert": weights["vert"].copy(),
+        "weight_group": weights["group"].copy(),
+        "weight_value": weights["value"].copy(),
+    }
+
+def write_lod_mesh(name, lod, source_mesh):
+    """Build a new mesh datablock from simplified arrays."""
+    mesh = bpy.data.meshes.new(name)
+    tris = lod["tris"]
+    n_tris = len(tris)
+
+    mesh.vertices.add(len(lod["co"]))
+    mesh.vertices.foreach_set("co", lod["co"].astype(np.float32).ravel())
+    mesh.loops.add(n_tris * 3)
+    mesh.loops.foreach_set("vertex_index", tris.astype(np.int32).ravel())
+    mesh.polygons.add(n_tris)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, n_tris * 3, 3, dtype=np.int32))
+    mesh.polygons.foreach_set("material_index", lod["tri_mat"].astype(np.int32))
+    mesh.polygons.foreach_set("use_smooth", lod["tri_smooth"].astype(bool))
+
+    for mat in source_mesh.materials:
+        mesh.materials.append(mat)
+
+    corner_uv = lod["corner_uv"].reshape(n_tris * 3, lod["corner_uv"].shape[-1])
+    for i, layer in enumerate(source_mesh.uv_layers):
+        uv = mesh.uv_layers.new(name=layer.name)
+        uv.data.foreach_set("uv", corner_uv[:, 2 * i:2 * i + 2].astype(np.float32).ravel())
+
+    for key, value in source_mesh.items():
+        mesh[key] = value
+
+    mesh.update()
+    return mesh
+
+def assign_lod_weights(obj, lod):
+    # Vertex groups were copied with the object, only the weights are missing
+    verts, groups, values = lod["weight_vert"], lod["weight_group"], lod["weight_value"]
+    for g in np.unique(groups):
+        if g >= len(obj.vertex_groups):
+            continue
+        vg = obj.vertex_groups[int(g)]
+        rows = groups == g
+        unique_values, inverse = np.unique(values[rows], return_inverse=True)
+        group_verts = verts[rows]
+        for i, w in enumerate(unique_values):
+            vg.add(group_verts[inverse == i].tolist(), float(w), 'REPLACE')
+
+# ------------------ Quadric simplifier ------------------
+
+def _accumulate(count, index, values):
+    # Sum rows of values into count buckets (np.add.at is much slower)
+    out = np.empty((count, values.shape[1]), dtype=np.float64)
+    for c in range(values.shape[1]):
+        out[:, c] = np.bincount(index, weights=values[:, c], minlength=count)
+    return out
+
+# Quadrics are symmetric 4x4, stored as their upper triangle (10 values)
+_QUADRIC_ROWS, _QUADRIC_COLS = np.triu_indices(4)
+_QUADRIC_SCALE = np.where(_QUADRIC_ROWS == _QUADRIC_COLS, 1.0, 2.0)
+
+def _plane_quadrics(planes, weights):
+    # planes (N, 4) -> weighted outer products (N, 10)
+    return planes[:, _QUADRIC_ROWS] * planes[:, _QUADRIC_COLS] * weights[:, None]
+
+def _quadric_error(q, h):
+    # h^T Q h for homogeneous points h (N, 4)
+    return np.einsum('ij,ij->i', q, h[:, _QUADRIC_ROWS] * h[:, _QUADRIC_COLS] * _QUADRIC_SCALE)
+
+def _tri_normals(pos, tris):
+    p0, p1, p2 = pos[tris[:, 0]], pos[tris[:, 1]], pos[tris[:, 2]]
+    return np.cross(p1 - p0, p2 - p0)
+
+def _half_edges(tris):
+    # Corner j of each triangle owns the edge (j, j+1)
+    a = tris.ravel()
+    b = np.roll(tris, -1, axis=1).ravel()
+    return a, b
+
+def _edge_keys(a, b, n_verts):
+    lo = np.minimum(a, b).astype(np.int64)
+    hi = np.maximum(a, b).astype(np.int64)
+    return lo * n_verts + hi
+
+def _sorted_unique(values):
+    # np.unique through a plain sort, hashing large int arrays is much slower
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]]] if len(values) else values
+
+def _any_vertex(mask, items):
+    # Rows of items (triangles or edges) with a vertex set in mask, column by
+    # column as reducing along a short last axis is several times slower
+    hit = mask[items[:, 0]]
+    for j in range(1, items.shape[1]):
+        hit |= mask[items[:, j]]
+    return hit
+
+def _unique_edges(tris, n_verts):
+    # (E, 2) vertex pairs, each edge once
+    a, b = _half_edges(tris)
+    keys = _sorted_unique(_edge_keys(a, b, n_verts))
+    return np.stack([keys // n_verts, keys % n_verts], axis=1)
+
+def _edge_costs(pos, quadrics, locked, dominant, ends):
+    """(E, 2) costs of moving the first end onto the second and the reverse."""
+    u, v = ends[:, 0], ends[:, 1]
+    q_sum = quadrics[u] + quadrics[v]
+    cost = np.empty((len(ends), 2))
+    cost[:, 0] = _quadric_error(q_sum, pos[v])
+    cost[:, 1] = _quadric_error(q_sum, pos[u])
+    cost[locked[u], 0] = np.inf
+    cost[locked[v], 1] = np.inf
+    if dominant is not None:
+        edge = pos[u, :3] - pos[v, :3]
+        length2 = np.einsum('ij,ij->i', edge, edge)
+        cost += ((dominant[u] != dominant[v]) * FEATURE_EDGE_WEIGHT * length2 * length2)[:, None]
+    return cost
+
+def _dominant_groups(n_verts, weight_vert, weight_group, weight_value):
+    dominant = np.full(n_verts, -1, dtype=np.int64)
+    if len(weight_vert):
+        order = np.lexsort((-weight_value, weight_vert))
+        verts = weight_vert[order]
+        first = np.r_[True, verts[1:] != verts[:-1]]
+        dominant[verts[first]] = weight_group[order][first]
+    return dominant
+
+def _seam_vertices(n_verts, tris, corner_uv):
+    # A vertex is on a seam if its corners don't all share the same UV
+    seam = np.zeros(n_verts, dtype=bool)
+    if corner_uv.shape[-1] == 0:
+        return seam
+    vc = tris.ravel()
+    uv = corner_uv.reshape(len(vc), corner_uv.shape[-1])
+    order = np.argsort(vc, kind='stable')
+    vs, us = vc[order], uv[order]
+    start = np.r_[True, vs[1:] != vs[:-1]]
+    first = np.maximum.accumulate(np.where(start, np.arange(len(vs)), 0))
+    differs = np.any(us != us[first], axis=1)
+    seam[vs[differs]] = True
+    return seam
+
+def _initial_quadrics(pos, tris, tri_mat, preserve_materials):
+    n_verts = len(pos)
+    normals = _tri_normals(pos[:, :3], tris)
+    area2 = np.linalg.norm(normals, axis=1)
+    valid = area2 > 1e-20
+    unit = np.zeros_like(normals)
+    unit[valid] = normals[valid] / area2[valid, None]
+    planes = np.hstack([unit, -np.einsum('ij,ij->i', unit, pos[tris[:, 0], :3])[:, None]])
+
+    face_q = _plane_quadrics(planes, area2 * 0.5)
+    quadrics = sum(_accumulate(n_verts, tris[:, j], face_q) for j in range(3))
+
+    # Feature edges: open boundaries, non-manifold edges and material borders
+    a, b = _half_edges(tris)
+    keys = _edge_keys(a, b, n_verts)
+    face = np.repeat(np.arange(len(tris)), 3)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    run = np.cumsum(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]][:len(keys)]) - 1
+    edge_count = np.empty(len(keys), dtype=np.int64)
+    edge_count[order] = np.bincount(run)[run]
+
+    feature = edge_count == 1
+    if preserve_materials:
+        same = sorted_keys[1:] == sorted_keys[:-1]
+        mat_sorted = tri_mat[face[order]]
+        border = same & (mat_sorted[1:] != mat_sorted[:-1])
+        feature[order[1:][border]] = True
+        feature[order[:-1][border]] = True
+
+    locked = np.zeros(n_verts, dtype=bool)
+    non_manifold = edge_count > 2
+    locked[a[non_manifold]] = True
+    locked[b[non_manifold]] = True
+
+    if np.any(feature):
+        fa, fb, ff = a[feature], b[feature], face[feature]
+        edge = pos[fb, :3] - pos[fa, :3]
+        length2 = np.einsum('ij,ij->i', edge, edge)
+        side = np.cross(edge, unit[ff])
+        side_len = np.linalg.norm(side, axis=1)
+        ok = side_len > 1e-20
+        side[ok] /= side_len[ok, None]
+        side_planes = np.hstack([side, -np.einsum('ij,ij->i', side, pos[fa, :3])[:, None]])
+        edge_q = _plane_quadrics(side_planes, FEATURE_EDGE_WEIGHT * length2 * ok)
+        quadrics += _accumulate(n_verts, np.r_[fa, fb], np.vstack([edge_q, edge_q]))
+
+    return quadrics, locked
+
+def _snapshot(arrays, tris, corner_uv, tri_mat, tri_smooth):
+    used = _sorted_unique(tris.ravel())
+    lod = {
+        "co": arrays["co"][used],
+        "tris": np.searchsorted(used, tris).astype(np.int32),
+        "corner_uv": corner_uv.copy(),
+        "tri_mat": tri_mat.copy(),
+        "tri_smooth": tri_smooth.copy(),
+        "vert_map": used.astype(np.int32),
+    }
+    weight_vert = arrays["weight_vert"]
+    is_used = np.zeros(len(arrays["co"]), dtype=bool)
+    is_used[used] = True
+    keep = is_used[weight_vert]
+    lod["weight_vert"] = np.searchsorted(used, weight_vert[keep]).astype(np.int32)
+    lod["weight_group"] = arrays["weight_group"][keep]
+    lod["weight_value"] = arrays["weight_value"][keep]
+    return lod
+
+def qem_simplify(arrays, targets, preserve_uv_seams=True, preserve_materials=True, respect_weights=True):
+    """Simplify a triangle mesh with quadric error metrics.
+
+    All LODs come out of one collapse sequence: the mesh is reduced once and
+    a copy is taken each time the triangle count drops below the next target.
+    Collapses are half-edge collapses (a vertex moves onto a neighbour), so
+    kept vertices keep their original position, UVs and bone weights.
+    Works on plain NumPy arrays so it can run without Blender.
+    """
+    pos = np.hstack([arrays["co"].astype(np.float64), np.ones((len(arrays["co"]), 1))])
+    n_verts = len(pos)
+    tris = arrays["tris"].astype(np.int64)
+    corner_uv = arrays["corner_uv"]
+    tri_mat = arrays["tri_mat"]
+    tri_smooth = arrays["tri_smooth"]
+
+    quadrics, locked = _initial_quadrics(pos, tris, tri_mat, preserve_materials)
+    if preserve_uv_seams:
+        locked |= _seam_vertices(n_verts, tris, corner_uv)
+
+    dominant = None
+    if respect_weights:
+        dominant = _dominant_groups(n_verts, arrays["weight_vert"], arrays["weight_group"], arrays["weight_value"])
+
+    # Fixed seed, the same mesh and settings always give the same LODs
+    rng = np.random.default_rng(0)
+    # Edges and their collapse costs, only refreshed around moved vertices
+    ends = _unique_edges(tris, n_verts)
+    cost = _edge_costs(pos, quadrics, locked, dominant, ends)
+    # Collapses rejected for flipping, retried once the mesh runs out of others
+    blocked = np.zeros(cost.shape, dtype=bool)
+    collapsed_since_unblock = False
+
+    lods = []
+    targets = list(targets)
+    while targets:
+        if len(tris) <= targets[0]:
+            lods.append(_snapshot(arrays, tris, corner_uv, tri_mat, tri_smooth))
+            targets.pop(0)
+            continue
+
+        # Candidate 2e + d moves ends[e, d] onto the other end
+        candidate_cost = np.where(blocked, np.inf, cost).ravel()
+        candidate_src = ends.ravel()
+        candidate_dst = ends[:, ::-1].ravel()
+        open_ = np.flatnonzero(np.isfinite(candidate_cost))
+        if not len(open_):
+            if blocked.any() and collapsed_since_unblock:
+                blocked[:] = False
+                collapsed_since_unblock = False
+                continue
+            break
+
+        # Cheapest collapse per vertex, ties to the lowest candidate, cheapest first
+        vert_min = np.full(n_verts, np.inf)
+        np.minimum.at(vert_min, candidate_src[open_], candidate_cost[open_])
+        cheapest = open_[candidate_cost[open_] == vert_min[candidate_src[open_]]]
+        first = np.full(n_verts, len(candidate_cost), dtype=np.int64)
+        np.minimum.at(first, candidate_src[cheapest], cheapest)
+        best = first[first < len(candidate_cost)]
+        best = best[np.argsort(candidate_cost[best], kind='stable')]
+        src, dst = candidate_src[best], candidate_dst[best]
+
+        # Only vertices that come first in every triangle around them may move,
+        # so no triangle ever sees two collapses at once. A few rounds pick up
+        # vertices whose neighbours were already taken; triangles without an
+        # open vertex or with a taken one drop out for good.
+        band = max(1, len(src) // COST_BANDS)
+        priority = (np.arange(len(src)) // band) * len(src) + rng.permutation(len(src))
+        none = np.iinfo(np.int64).max
+        accepted = np.zeros(len(src), dtype=bool)
+        blocked_vert = np.zeros(n_verts, dtype=bool)
+        live = np.arange(len(tris))
+        for _ in range(6):
+            open_ = ~accepted & ~blocked_vert[src]
+            if not np.any(open_):
+                break
+            rank = np.full(n_verts, none, dtype=np.int64)
+            rank[src[open_]] = priority[open_]
+            live_tris = tris[live]
+            tri_claim = np.minimum(np.minimum(rank[live_tris[:, 0]], rank[live_tris[:, 1]]), rank[live_tris[:, 2]])
+            has_open = tri_claim < none
+            live, live_tris, tri_claim = live[has_open], live_tris[has_open], tri_claim[has_open]
+            claim = np.full(n_verts, none, dtype=np.int64)
+            np.minimum.at(claim, live_tris.ravel(), np.repeat(tri_claim, 3))
+            new = open_ & (claim[src] == rank[src])
+            accepted |= new
+            is_new = np.zeros(n_verts, dtype=bool)
+            is_new[src[new]] = True
+            taken = _any_vertex(is_new, live_tris)
+            blocked_vert[live_tris[taken].ravel()] = True
+            live = live[~taken]
+        src, dst, best = src[accepted], dst[accepted], best[accepted]
+
+        # Each collapse removes at least one triangle
+        needed = len(tris) - targets[0]
+        src, dst, best = src[:needed], dst[:needed], best[:needed]
+
+        # Drop collapses that would flip a triangle, only triangles around a src move
+        is_src = np.zeros(n_verts, dtype=bool)
+        is_src[src] = True
+        around = tris[_any_vertex(is_src, tris)]
+        while len(src):
+            remap = np.arange(n_verts)
+            remap[src] = dst
+            new_tris = remap[around]
+            moved = (new_tris[:, 0] != around[:, 0]) | (new_tris[:, 1] != around[:, 1]) | (new_tris[:, 2] != around[:, 2])
+            alive = (new_tris[:, 0] != new_tris[:, 1]) & (new_tris[:, 1] != new_tris[:, 2]) & (new_tris[:, 2] != new_tris[:, 0])
+            check = moved & alive
+            old_n = _tri_normals(pos[:, :3], around[check])
+            new_n = _tri_normals(pos[:, :3], new_tris[check])
+            dot = np.einsum('ij,ij->i', old_n, new_n)
+            limit_dot = FLIP_COS_LIMIT * np.linalg.norm(old_n, axis=1) * np.linalg.norm(new_n, axis=1)
+            flipped = dot < limit_dot
+            if not np.any(flipped):
+                break
+            keep = ~np.isin(src, around[check][flipped])
+            blocked.reshape(-1)[best[~keep]] = True
+            src, dst, best = src[keep], dst[keep], best[keep]
+
+        if not len(src):
+            continue
+        collapsed_since_unblock = True
+
+        # Cheapest collapses that reach the next target without overshooting,
+        # boundary collapses remove one triangle and the rest two
+        slot = np.full(n_verts, -1, dtype=np.int64)
+        slot[src] = np.arange(len(src))
+        dead = around[~alive]
+        owner = np.maximum(np.maximum(slot[dead[:, 0]], slot[dead[:, 1]]), slot[dead[:, 2]])
+        removed = np.cumsum(np.bincount(owner[owner >= 0], minlength=len(src)))
+        count = np.searchsorted(removed, needed) + 1
+        src, dst = src[:count], dst[:count]
+
+        remap = np.arange(n_verts)
+        remap[src] = dst
+
+        # Corners that move from src to dst take dst's UV as seen from a shared triangle
+        if corner_uv.shape[-1]:
+            is_src = np.zeros(n_verts, dtype=bool)
+            is_src[src] = True
+            rows = np.flatnonzero(_any_vertex(is_src, tris))
+            near, near_uv = tris[rows], corner_uv[rows]
+            uv_target = np.zeros((n_verts, corner_uv.shape[-1]), dtype=corner_uv.dtype)
+            for j in range(3):
+                moving = is_src[near[:, j]]
+                target = remap[near[moving, j]]
+                for k in range(3):
+                    if k == j:
+                        continue
+                    shared = np.flatnonzero(moving)[near[moving, k] == target]
+                    uv_target[near[shared, j]] = near_uv[shared, k]
+            corner_uv = corner_uv.copy()
+            for j in range(3):
+                moving = is_src[near[:, j]]
+                corner_uv[rows[moving], j] = uv_target[near[moving, j]]
+
+        quadrics[dst] += quadrics[src]
+        tris = remap[tris]
+        alive = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 2] != tris[:, 0])
+        tris = tris[alive]
+        corner_uv = corner_uv[alive]
+        tri_mat = tri_mat[alive]
+        tri_smooth = tri_smooth[alive]
+
+        # Edges off the moved vertices and their quadrics are unchanged,
+        # the ones around a dst are rebuilt from the triangles touching it
+        is_moved = np.zeros(n_verts, dtype=bool)
+        is_moved[src] = True
+        is_moved[dst] = True
+        stale = _any_vertex(is_moved, ends)
+        is_dst = np.zeros(n_verts, dtype=bool)
+        is_dst[dst] = True
+        fresh = _unique_edges(tris[_any_vertex(is_dst, tris)], n_verts)
+        fresh = fresh[_any_vertex(is_dst, fresh)]
+        ends = np.concatenate([ends[~stale], fresh])
+        cost = np.concatenate([cost[~stale], _edge_costs(pos, quadrics, locked, dominant, fresh)])
+        blocked = np.concatenate([blocked[~stale], np.zeros(fresh.shape, dtype=bool)])
+
+    # Whatever couldn't be reached gets the most reduced mesh we have
+    for _ in targets:
+        lods.append(_snapshot(arrays, tris, corner_uv, tri_mat, tri_smooth))
+
+    return lods
+
+# ------------------ Worker processes ------------------
+
+def save_arrays(path, arrays):
+    np.savez(path, **arrays)
+
+def load_arrays(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+def save_lods(path, lods):
+    flat = {"count": np.array(len(lods))}
+    for i, lod in enumerate(lods):
+        for key, value in lod.items():
+            flat[f"{i}/{key}"] = value
+    np.savez(path, **flat)
+
+def load_lods(path):
+    data = load_arrays(path)
+    lods = [{} for _ in range(int(data.pop("count")))]
+    for name, value in data.items():
+        i, key = name.split("/", 1)
+        lods[int(i)][key] = value
+    return lods
+
+def split_jobs(jobs, worker_count):
+    # Largest meshes first, each to the least loaded worker
+    chunks = [[] for _ in range(worker_count)]
+    load = [0] * worker_count
+    for job in sorted(jobs, key=lambda j: j["tris"], reverse=True):
+        i = load.index(min(load))
+        chunks[i].append(job)
+        load[i] += job["tris"]
+    return [chunk for chunk in chunks if chunk]
+
+def run_lod_worker(manifest_path):
+    """Entry point for background Blender workers (see simplify_parallel)."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    options = manifest["options"]
+    for job in manifest["jobs"]:
+        lods = qem_simplify(load_arrays(job["input"]), job["targets"], **options)
+        # Renamed into place, so a worker killed while writing leaves no output
+        partial = job["output"] + ".part.npz"
+        save_lods(partial, lods)
+        os.replace(partial, job["output"])
+        print(f"[SM2 LOD] {os.path.basename(job['input'])}: {[len(lod['tris']) for lod in lods]}")
+
+def simplify_parallel(jobs, options, worker_count):
+    """Simplify saved .npz jobs in background Blender processes.
+
+    Each worker is `blender -b` running this file with a manifest of jobs,
+    so the simplifier doesn't need anything but NumPy. Workers still running
+    after WORKER_TIMEOUT are killed. Returns the list of jobs that failed so
+    the caller can redo them in process, the failed workers' stderr is printed.
+    """
+    work_dir = os.path.dirname(jobs[0]["input"])
+    procs = []
+    for n, chunk in enumerate(split_jobs(jobs, worker_count)):
+        manifest_path = os.path.join(work_dir, f"worker_{n}.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "jobs": chunk}, f)
+        cmd = [
+            bpy.app.binary_path, "-b", "--factory-startup",
+            "--python", os.path.abspath(__file__),
+            "--", "--sm2-lod-worker", manifest_path,
+        ]
+        # stderr goes to a file, a pipe nobody reads could fill up and stall the worker
+        log_path = os.path.join(work_dir, f"worker_{n}.log")
+        with open(log_path, "w", encoding="utf-8") as log:
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=log)
+        procs.append((n, chunk, log_path, proc))
+
+    deadline = time.perf_counter() + WORKER_TIMEOUT
+    failed = []
+    for n, chunk, log_path, proc in procs:
+        try:
+            proc.wait(timeout=max(1, deadline - time.perf_counter()))
+            problem = f"exited with {proc.returncode}"
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            problem = f"killed after {WORKER_TIMEOUT} s"
+        lost = [job for job in chunk if not os.path.isfile(job["output"])]
+        if lost:
+            with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+                err = f.read().strip()[-2000:]
+            print(f"[SM2 LOD] worker {n} {problem}, redoing {', '.join(job['name'] for job in lost)} here:\n{err}")
+            failed.extend(lost)
+    return failed
+
+# ------------------ LOD cache ------------------
+
+def mesh_content_hash(mesh, obj=None):
+    """Hash the vertex, index, material, UV and weight buffers of a mesh."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def feed(collection, attr, dtype, width):
+        data = np.empty(len(collection) * width, dtype=dtype)
+        collection.foreach_get(attr, data)
+        h.update(attr.encode())
+        h.update(data.tobytes())
+
+    feed(mesh.vertices, "co", np.float32, 3)
+    feed(mesh.loops, "vertex_index", np.int32, 1)
+    feed(mesh.polygons, "loop_start", np.int32, 1)
+    feed(mesh.polygons, "material_index", np.int32, 1)
+    feed(mesh.polygons, "use_smooth", bool, 1)
+    for layer in mesh.uv_layers:
+        h.update(layer.name.encode())
+        feed(layer.data, "uv", np.float32, 2)
+    for mat in mesh.materials:
+        h.update((mat.name if mat else "").encode())
+
+    if obj is not None and obj.vertex_groups:
+        h.update("|".join(g.name for g in obj.vertex_groups).encode())
+        h.update(read_vertex_weights(mesh).tobytes())
+
+    return h.hexdigest()
+
+def source_properties(obj):
+    # Custom properties LOD objects carry over from their source
+    props = obj.id_properties_ensure().to_dict()
+    return {key: value for key, value in props.items() if key not in LOD_OWN_KEYS}
+
+def armature_modifier_state(obj):
+    return [
+        (mod.name, mod.object.name if mod.object else "", mod.use_vertex_groups, mod.use_deform_preserve_volume)
+        for mod in obj.modifiers if mod.type == 'ARMATURE'
+    ]
+
+def lod_settings_hash(obj, settings):
+    """Cache key of an object's LODs: settings, mesh content and everything synced onto them."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps(settings, sort_keys=True).encode())
+    h.update(json.dumps(source_properties(obj), sort_keys=True, default=repr).encode())
+    h.update(repr(armature_modifier_state(obj)).encode())
+    if obj.type == 'MESH':
+        h.update(mesh_content_hash(obj.data, obj).encode())
+    return h.hexdigest()
+
+def find_lod_children(obj, base_name, lod_count, remove_extras=False):
+    """Existing LOD children by level, optionally removing extra `.001` copies of a level."""
+    found = {}
+    for child in list(obj.children):
+        name = clean_blender_suffix(child.name)
+        for i in range(1, lod_count + 1):
+            if name != f"{base_name}_lod{i}":
+                continue
+            if i in found:
+                # Keep the copy without a Blender suffix
+                keep, extra = (child, found[i]) if child.name == name else (found[i], child)
+                found[i] = keep
+                if remove_extras:
+                    bpy.data.objects.remove(extra)
+            else:
+                found[i] = child
+            break
+    return found
+
+def sync_vertex_groups(obj, dup):
+    names = [g.name for g in obj.vertex_groups]
+    if [g.name for g in dup.vertex_groups] != names:
+        dup.vertex_groups.clear()
+        for name in names:
+            dup.vertex_groups.new(name=name)
+
+def replace_mesh_data(dup, mesh):
+    old = dup.data
+    dup.data = mesh
+    if old is not None and old.users == 0:
+        bpy.data.meshes.remove(old)
+
+# ------------------ LOD meshes ------------------
+
+def lod_targets_for(settings, tri_count):
+    try:
+        return parse_triangle_budgets(settings.get("triangle_budgets", ""), tri_count, settings["lod_count"], settings["ratio"])
+    except ValueError:
+        # Proxies saved before budgets were checked on creation
+        return parse_triangle_budgets("", tri_count, settings["lod_count"], settings["ratio"])
+
+def simplify_for_settings(obj, settings):
+    arrays = read_mesh_arrays(obj.data, bool(obj.vertex_groups))
+    options = {key: settings[key] for key in SIMPLIFY_OPTION_KEYS if key in settings}
+    return qem_simplify(arrays, lod_targets_for(settings, len(arrays["tris"])), **options)
+
+def fill_lod_mesh(obj, dup, lod_name, level, ratio, lods):
+    """Give a LOD object its own reduced copy of the source mesh."""
+    sync_vertex_groups(obj, dup)
+    if lods is not None:
+        replace_mesh_data(dup, write_lod_mesh(lod_name, lods[level - 1], obj.data))
+        assign_lod_weights(dup, lods[level - 1])
+        return
+
+    replace_mesh_data(dup, obj.data.copy())
+
+    # Add decimate modifiers
+    for j in range(level):
+        decimod = dup.modifiers.new(name=f"Decimate_{j+1}", type='DECIMATE')
+        decimod.ratio = ratio
+
+    # Apply only decimate modifiers
+    bpy.context.view_layer.objects.active = dup
+    dup.select_set(True)
+    for mod in list(dup.modifiers):
+        if mod.type == 'DECIMATE':
+            bpy.ops.object.modifier_apply(modifier=mod.name)
+    dup.select_set(False)
+
+# ------------------ LOD proxies ------------------
+
+# Proxies turned into real meshes for an export: LOD object name -> proxy settings
+_materialized = {}
+# LOD bookkeeping held back during an export: object name -> {key: value}
+_stashed_state = {}
+
+def find_lod_proxies():
+    return [
+        obj for obj in bpy.data.objects
+        if obj.type == 'MESH' and LOD_PROXY_KEY in obj and obj.parent is not None
+    ]
+
+def materialize_lod_proxies(proxies, temporary):
+    """Build the real LOD meshes for proxies.
+
+    Temporary materializations are remembered so restore_lod_proxies can put
+    the shared source mesh back after an export.
+    """
+    groups = collections.defaultdict(list)
+    for dup in proxies:
+        groups[(dup.parent.name, dup[LOD_PROXY_KEY])].append(dup)
+
+    for (parent_name, text), dups in groups.items():
+        obj = bpy.data.objects[parent_name]
+        settings = json.loads(text)
+        lods = simplify_for_settings(obj, settings) if settings["method"] == 'QEM' else None
+        for dup in dups:
+            level = min(int(dup.get(LOD_LEVEL_KEY, 1)), settings["lod_count"])
+            fill_lod_mesh(obj, dup, clean_blender_suffix(dup.name), level, settings["ratio"], lods)
+            if temporary:
+                _materialized[dup.name] = text
+            # Proxy settings shouldn't end up in exported custom properties
+            del dup[LOD_PROXY_KEY]
+
+    return len(proxies)
+
+def stash_lod_state():
+    """Take the LOD cache keys off every object until restore_lod_state, so exports don't carry them."""
+    for obj in bpy.data.objects:
+        state = {key: obj[key] for key in LOD_STATE_KEYS if key in obj}
+        if state and obj.library is None:
+            for key in state:
+                del obj[key]
+            _stashed_state.setdefault(obj.name, {}).update(state)
+
+def restore_lod_state():
+    for name, state in _stashed_state.items():
+        obj = bpy.data.objects.get(name)
+        if obj is not None:
+            for key, value in state.items():
+                obj[key] = value
+    _stashed_state.clear()
+
+def restore_lod_proxies():
+    restored = 0
+    for name, text in _materialized.items():
+        dup = bpy.data.objects.get(name)
+        if dup is None or dup.parent is None or dup.parent.type != 'MESH':
+            continue
+        replace_mesh_data(dup, dup.parent.data)
+        dup[LOD_PROXY_KEY] = text
+        restored += 1
+    _materialized.clear()
+    return restored
+
+# ------------------ LOD report ------------------
+
+# Last report per source object name, shown in the panel
+_lod_reports = {}
+
+REPORT_COLUMNS = ("level", "name", "tris", "verts", "ratio", "hausdorff", "rms", "hausdorff_pct")
+
+def sample_surface(co, tris, count, rng):
+    # Area weighted random points on the triangles
+    if not len(tris):
+        return np.empty((0, 3))
+    p0, p1, p2 = co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]]
+    area = np.linalg.norm(np.cross(p1 - p0, p2 - p0), axis=1)
+    if area.sum() <= 0.0:
+        return p0.astype(np.float64)
+    picks = rng.choice(len(tris), size=count, p=area / area.sum())
+    u, v = rng.random(count), rng.random(count)
+    flip = u + v > 1.0
+    u[flip], v[flip] = 1.0 - u[flip], 1.0 - v[flip]
+    return p0[picks] + (p1[picks] - p0[picks]) * u[:, None] + (p2[picks] - p0[picks]) * v[:, None]
+
+def nearest_distances(bvh, points):
+    distances = np.empty(len(points))
+    for i, p in enumerate(points.tolist()):
+        hit = bvh.find_nearest(p)
+        distances[i] = hit[3] if hit[0] is not None else np.inf
+    return distances
+
+def lod_report(obj, sample_count=20000, seed=0):
+    """Triangle/vertex counts and approximate surface error of each LOD vs LOD0.
+
+    Error is measured both ways between points sampled on one surface and the
+    nearest point on the other (BVH lookups), so it approximates the
+    symmetric Hausdorff distance. Distances are in local mesh units.
+    Proxies still share the LOD0 mesh and are left out until they are baked.
+    """
+    rng = np.random.default_rng(seed)
+    base_name = clean_blender_suffix(obj.name)
+    co0, tris0 = read_mesh_geometry(obj.data)
+    bvh0 = BVHTree.FromPolygons(co0.tolist(), tris0.tolist())
+    points0 = sample_surface(co0, tris0, sample_count, rng)
+    diagonal = float(np.linalg.norm(co0.max(axis=0) - co0.min(axis=0))) if len(co0) else 0.0
+
+    rows = [{
+        "level": 0, "name": obj.name, "tris": len(tris0), "verts": len(co0),
+        "ratio": 1.0, "hausdorff": 0.0, "rms": 0.0, "hausdorff_pct": 0.0,
+    }]
+
+    for level, child in sorted(find_lod_children(obj, base_name, MAX_LODS).items()):
+        if child.type != 'MESH' or LOD_PROXY_KEY in child:
+            continue
+        # LOD meshes keep the source's local coordinates, compare them as they are
+        co, tris = read_mesh_geometry(child.data)
+
+        if len(tris):
+            bvh = BVHTree.FromPolygons(co.tolist(), tris.tolist())
+            distances = np.concatenate([
+                nearest_distances(bvh0, sample_surface(co, tris, sample_count, rng)),
+                nearest_distances(bvh, points0),
+            ])
+            hausdorff = float(distances.max())
+            rms = float(np.sqrt(np.mean(distances ** 2)))
+        else:
+            hausdorff = rms = float("inf")
+
+        rows.append({
+            "level": level,
+            "name": child.name,
+            "tris": len(tris),
+            "verts": len(co),
+            "ratio": len(tris) / max(1, len(tris0)),
+            "hausdorff": hausdorff,
+            "rms": rms,
+            "hausdorff_pct": 100.0 * hausdorff / diagonal if diagonal else 0.0,
+        })
+
+    return rows
+
+def write_report_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def has_lod_children(obj):
+    base_name = clean_blender_suffix(obj.name)
+    return obj.type == 'MESH' and bool(find_lod_children(obj, base_name, MAX_LODS))
+
+def run_report_benchmark(args):
+    """Time LOD reports on the largest meshes of the open file.
+
+    blender -b vehicle.blend --python LOD_maker.py -- --sm2-lod-report-benchmark [top] [samples]
+    """
+    top = int(args[0]) if len(args) > 0 else 5
+    samples = int(args[1]) if len(args) > 1 else 20000
+    sources = [obj for obj in bpy.data.objects if LOD_LEVEL_KEY not in obj and has_lod_children(obj)]
+    sources.sort(key=lambda o: len(o.data.polygons), reverse=True)
+
+    total = 0.0
+    for obj in sources[:top]:
+        start = time.perf_counter()
+        rows = lod_report(obj, samples)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        levels = ", ".join(f"lod{r['level']} {r['tris']} tris {r['hausdorff_pct']:.3f}%" for r in rows)
+        print(f"[SM2 LOD report] {obj.name}: {elapsed:.3f}s ({levels})")
+    print(f"[SM2 LOD report] {min(top, len(sources))} object(s), {samples} samples, total {total:.3f}s")
+
+def run_simplify_benchmark(args):
+    """Time the quadric simplifier against stacked Decimate modifiers.
+
+    blender -b vehicle.blend --python LOD_maker.py -- --sm2-lod-simplify-benchmark [top] [lod_count] [ratio]
+
+    Both build every LOD of the largest meshes of the open file as meshes,
+    nothing is kept.
+    """
+    top = int(args[0]) if len(args) > 0 else 3
+    lod_count = int(args[1]) if len(args) > 1 else 5
+    ratio = float(args[2]) if len(args) > 2 else 0.5
+    sources = [obj for obj in bpy.data.objects if obj.type == 'MESH' and LOD_LEVEL_KEY not in obj]
+    sources.sort(key=lambda o: len(o.data.polygons), reverse=True)
+
+    totals = {"qem": 0.0, "decimate": 0.0}
+    for obj in sources[:top]:
+        start = time.perf_counter()
+        arrays = read_mesh_arrays(obj.data, bool(obj.vertex_groups))
+        lods = qem_simplify(arrays, parse_triangle_budgets("", len(arrays["tris"]), lod_count, ratio))
+        meshes = [write_lod_mesh(f"{obj.name}_bench_qem{level}", lod, obj.data) for level, lod in enumerate(lods, 1)]
+        qem_time = time.perf_counter() - start
+        qem_tris = [len(lod["tris"]) for lod in lods]
+        for mesh in meshes:
+            bpy.data.meshes.remove(mesh)
+
+        start = time.perf_counter()
+        decimate_tris = []
+        for level in range(1, lod_count + 1):
+            dup = obj.copy()
+            bpy.context.collection.objects.link(dup)
+            fill_lod_mesh(obj, dup, f"{obj.name}_bench_dec{level}", level, ratio, None)
+            decimate_tris.append(len(read_mesh_geometry(dup.data)[1]))
+            mesh = dup.data
+            bpy.data.objects.remove(dup)
+            bpy.data.meshes.remove(mesh)
+        decimate_time = time.perf_counter() - start
+
+        totals["qem"] += qem_time
+        totals["decimate"] += decimate_time
+        print(f"[SM2 LOD benchmark] {obj.name} ({len(arrays['tris'])} tris): "
+              f"QEM {qem_time:.2f}s {qem_tris}, Decimate {decimate_time:.2f}s {decimate_tris}")
+    print(f"[SM2 LOD benchmark] {min(top, len(sources))} object(s), "
+          f"QEM {totals['qem']:.2f}s, Decimate {totals['decimate']:.2f}s")
+
+# ------------------ LOD distances ------------------
+
+def bounding_sphere(co):
+    # Box centre and furthest vertex, close enough to Ritter for switching
+    if not len(co):
+        return np.zeros(3), 0.0
+    center = (co.min(axis=0) + co.max(axis=0)) * 0.5
+    return center, float(np.sqrt(np.max(np.sum((co - center) ** 2, axis=1))))
+
+def screen_size_at(radius, distance, fov):
+    # Fraction of the screen height covered by the bounding sphere
+    if distance <= 0.0:
+        return 1.0
+    return min(1.0, radius / (distance * math.tan(fov * 0.5)))
+
+def switch_distance(radius, tris, fov, screen_height, pixels_per_triangle):
+    """Distance where a mesh drops below pixels_per_triangle on screen.
+
+    About half the triangles face the camera and share the projected disc of
+    the bounding sphere (pi * r_px^2).
+    """
+    if radius <= 0.0 or tris <= 0:
+        return 0.0
+    radius_px = math.sqrt(pixels_per_triangle * tris * 0.5 / math.pi)
+    return radius * screen_height / (2.0 * math.tan(fov * 0.5) * radius_px)
+
+def lod_triangle_count(obj, lod_obj, level):
+    # Proxies still share the source mesh, use the budget they will be built with
+    if LOD_PROXY_KEY in lod_obj:
+        settings = json.loads(lod_obj[LOD_PROXY_KEY])
+        return lod_targets_for(settings, len(read_mesh_geometry(obj.data)[1]))[min(level, settings["lod_count"]) - 1]
+    return len(read_mesh_geometry(lod_obj.data)[1])
+
+def lod_thresholds(obj, fov, screen_height, pixels_per_triangle):
+    """Recommended switch distances for LOD0..N of a source object.
+
+    LOD i takes over where LOD i-1 would be drawn with fewer than
+    pixels_per_triangle pixels per triangle.
+    """
+    scale = max(abs(v) for v in obj.matrix_world.to_scale())
+    levels = {0: obj}
+    levels.update(find_lod_children(obj, clean_blender_suffix(obj.name), MAX_LODS))
+
+    rows = []
+    previous_tris = None
+    previous_distance = 0.0
+    for level, lod_obj in sorted(levels.items()):
+        if lod_obj.type != 'MESH':
+            continue
+        co, tris = read_mesh_geometry(lod_obj.data)
+        _, radius = bounding_sphere(co)
+        radius *= scale
+        tri_count = len(tris) if level == 0 else lod_triangle_count(obj, lod_obj, level)
+
+        distance = 0.0
+        if previous_tris is not None:
+            distance = max(previous_distance, switch_distance(radius, previous_tris, fov, screen_height, pixels_per_triangle))
+
+        rows.append({
+            "level": level,
+            "object": lod_obj,
+            "radius": radius,
+            "tris": tri_count,
+            "density": tri_count / (4.0 * math.pi * radius * radius) if radius > 0.0 else 0.0,
+            "distance": distance,
+            "screen_size": screen_size_at(radius, distance, fov),
+        })
+        previous_tris = tri_count
+        previous_distance = distance
+
+    return rows
+
+def write_lod_thresholds(obj, rows):
+    for row in rows:
+        lod_obj = row["object"]
+        lod_obj[LOD_DISTANCE_KEY] = round(row["distance"], 3)
+        lod_obj[LOD_SCREEN_SIZE_KEY] = round(row["screen_size"], 5)
+    obj[LOD_DISTANCES_KEY] = [round(row["distance"], 3) for row in rows]
+    obj[LOD_RADIUS_KEY] = round(rows[0]["radius"], 4) if rows else 0.0
+
+# ------------------ Vertex cache ------------------
+
+def acmr(tris, cache_size=VERTEX_CACHE_SIZE):
+    """Average cache miss ratio (misses per triangle) for a FIFO vertex cache."""
+    cache = collections.deque()
+    inside = set()
+    misses = 0
+    for v in tris.ravel().tolist():
+        if v not in inside:
+            misses += 1
+            cache.append(v)
+            inside.add(v)
+            if len(cache) > cache_size:
+                inside.discard(cache.popleft())
+    return misses / max(1, len(tris))
+
+def forsyth_order(tris, n_verts, cache_size=VERTEX_CACHE_SIZE):
+    """Triangle order for vertex cache reuse (Tom Forsyth's linear-speed algorithm).
+
+    Vertices score by their position in a simulated LRU cache plus a bonus for
+    few remaining triangles; the next triangle is the best scoring one that
+    touches the cache. Adjacency and the starting scores are set up with
+    NumPy, but picking triangles is inherently sequential and stays a Python
+    loop over the cache, roughly 15 s per million triangles.
+    """
+    n_tris = len(tris)
+    if not n_tris:
+        return np.zeros(0, dtype=np.int64)
+    flat = tris.ravel()
+    counts = np.bincount(flat, minlength=n_verts)
+    # Triangles around each vertex, cut from one sort of the corners
+    offsets = np.r_[0, np.cumsum(counts)].tolist()
+    tri_of = (np.argsort(flat, kind='stable') // 3).tolist()
+    adjacent = [tri_of[offsets[v]:offsets[v + 1]] for v in range(n_verts)]
+    valence = counts.tolist()
+
+    cache_score = [0.75] * 3 + [(1.0 - (i - 3) / (cache_size - 3)) ** 1.5 for i in range(3, cache_size)]
+    valence_table = np.r_[0.0, 2.0 * np.arange(1, counts.max() + 1) ** -0.5]
+    valence_score = valence_table.tolist()
+    vert_score = valence_table[counts]
+    best = int(np.argmax(vert_score[tris].sum(axis=1)))
+    vert_score = vert_score.tolist()
+    tri_verts = tris.tolist()
+
+    added = [False] * n_tris
+    cache = []
+    order = []
+    scan = 0
+    while len(order) < n_tris:
+        if best < 0:
+            # Nothing left around the cache, start again elsewhere
+            while added[scan]:
+                scan += 1
+            best = scan
+
+        t = best
+        added[t] = True
+        order.append(t)
+        a, b, c = tri_verts[t]
+        for v in (a, b, c):
+            valence[v] -= 1
+            adjacent[v].remove(t)
+
+        new_cache = [a, b, c] + [v for v in cache if v != a and v != b and v != c]
+        for v in new_cache[cache_size:]:
+            vert_score[v] = valence_score[valence[v]]
+        cache = new_cache[:cache_size]
+        for i, v in enumerate(cache):
+            vert_score[v] = cache_score[i] + valence_score[valence[v]] if valence[v] else 0.0
+
+        best = -1
+        best_score = -1.0
+        for v in cache:
+            for tt in adjacent[v]:
+                x, y, z = tri_verts[tt]
+                score = vert_score[x] + vert_score[y] + vert_score[z]
+                if score > best_score:
+                    best_score = score
+                    best = tt
+
+    return np.array(order, dtype=np.int64)
+
+def first_use_order(indices, n_verts):
+    # Vertices in the order they are first fetched, unused ones last
+    _, first = np.unique(indices, return_index=True)
+    used = indices[np.sort(first)]
+    unused = np.setdiff1d(np.arange(n_verts), used, assume_unique=True)
+    return np.r_[used, unused]
+
+def optimize_vertex_cache(mesh):
+    """Reorder faces for vertex cache reuse, then vertices for fetch locality.
+
+    Polygons keep their triangles together, so faces are ordered by the first
+    of their triangles in the optimized order. Returns ACMR before and after.
+    """
+    mesh.calc_loop_triangles()
+    n_tris = len(mesh.loop_triangles)
+    tris = np.empty(n_tris * 3, dtype=np.int64)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    tris = tris.reshape(-1, 3)
+    tri_poly = np.empty(n_tris, dtype=np.int64)
+    mesh.loop_triangles.foreach_get("polygon_index", tri_poly)
+    before = acmr(tris)
+
+    tri_order = forsyth_order(tris, len(mesh.vertices))
+    poly_order = first_use_order(tri_poly[tri_order], len(mesh.polygons))
+    poly_rank = np.empty(len(poly_order), dtype=np.int64)
+    poly_rank[poly_order] = np.arange(len(poly_order))
+
+    # Loop vertices in the new face order give the fetch order
+    loop_start = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    loop_vert = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get("vertex_index", loop_vert)
+    lengths = loop_total[poly_order]
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    loops = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(loop_start[poly_order], lengths)
+    vert_order = first_use_order(loop_vert[loops], len(mesh.vertices))
+    vert_rank = np.empty(len(vert_order), dtype=np.int64)
+    vert_rank[vert_order] = np.arange(len(vert_order))
+
+    # BMesh sorting keeps UVs, weights, shape keys and other layers intact
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.faces.index_update()
+    bm.verts.index_update()
+    poly_rank = poly_rank.tolist()
+    vert_rank = vert_rank.tolist()
+    bm.faces.sort(key=lambda f: poly_rank[f.index])
+    bm.verts.sort(key=lambda v: vert_rank[v.index])
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+    mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int64)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    return before, acmr(tris.reshape(-1, 3))
+
+# Meshes swapped for reordered copies during an export:
+# object name -> (original mesh name, its library path or None, copy name)
+_cache_swaps = {}
+
+# Modifiers that address the mesh by vertex or face index
+INDEX_MODIFIERS = {'HOOK', 'SURFACE_DEFORM', 'MESH_DEFORM', 'LAPLACIANDEFORM', 'CORRECTIVE_SMOOTH', 'MESH_CACHE'}
+
+def index_dependent_objects():
+    """Mesh objects whose vertex order something else relies on.
+
+    Hooks, binds and mesh caches on the object itself, surface or mesh
+    deform modifiers bound to it, and children parented to its vertices.
+    """
+    names = set()
+    for obj in bpy.data.objects:
+        if obj.parent is not None and obj.parent_type in {'VERTEX', 'VERTEX_3'}:
+            names.add(obj.parent.name)
+        for mod in obj.modifiers:
+            if mod.type in INDEX_MODIFIERS:
+                names.add(obj.name)
+            target = getattr(mod, "target", None) or getattr(mod, "object", None)
+            if mod.type in {'SURFACE_DEFORM', 'MESH_DEFORM'} and target is not None:
+                names.add(target.name)
+    return names
+
+def optimize_for_export(objects):
+    """Give the objects reordered copies of their meshes until restore_vertex_cache.
+
+    Originals, other users of the meshes and linked data stay untouched.
+    Returns ({mesh name: (ACMR before, after)}, names of objects skipped for
+    index users).
+    """
+    dependent = index_dependent_objects()
+    by_mesh = collections.defaultdict(list)
+    skipped = []
+    for obj in objects:
+        if obj.type != 'MESH' or obj.name in _cache_swaps:
+            continue
+        if obj.name in dependent:
+            skipped.append(obj.name)
+        else:
+            by_mesh[obj.data].append(obj)
+
+    results = {}
+    for mesh, objs in by_mesh.items():
+        name = mesh.name
+        copy = mesh.copy()
+        results[name] = optimize_vertex_cache(copy)
+        if mesh.library is None:
+            # The copy takes the name so the export looks the same
+            mesh.name = f"{name}_sm2_cache_orig"
+            copy.name = name
+        library = mesh.library.filepath if mesh.library else None
+        for obj in objs:
+            obj.data = copy
+            _cache_swaps[obj.name] = (mesh.name, library, copy.name)
+    return results, skipped
+
+def restore_vertex_cache():
+    restored = 0
+    copies = set()
+    for obj_name, (mesh_name, library, copy_name) in _cache_swaps.items():
+        obj = bpy.data.objects.get(obj_name)
+        mesh = bpy.data.meshes.get((mesh_name, library))
+        if obj is None or mesh is None:
+            continue
+        copies.add(obj.data)
+        obj.data = mesh
+        restored += 1
+    for copy in copies:
+        if copy.users == 0:
+            bpy.data.meshes.remove(copy)
+    for mesh_name, library, copy_name in _cache_swaps.values():
+        mesh = bpy.data.meshes.get((mesh_name, library))
+        if mesh is not None and library is None and mesh_name.endswith("_sm2_cache_orig"):
+            mesh.name = mesh_name[:-len("_sm2_cache_orig")]
+    _cache_swaps.clear()
+    return restored
+
+# ------------------ Operator ------------------
+
+def copy_armature_modifiers(obj, dup):
+    for mod in obj.modifiers:
+        if mod.type == 'ARMATURE':
+            new_mod = dup.modifiers.new(name=mod.name, type='ARMATURE')
+            new_mod.object = mod.object
+            new_mod.use_vertex_groups = mod.use_vertex_groups
+            new_mod.use_deform_preserve_volume = mod.use_deform_preserve_volume
+
+def sync_lod_object(obj, dup):
+    """Bring a LOD object's custom properties and armature modifiers in line with its source."""
+    props = source_properties(obj)
+    for key in set(dup.keys()) - props.keys() - LOD_OWN_KEYS:
+        del dup[key]
+    for key, value in props.items():
+        dup[key] = value
+    for mod in [mod for mod in dup.modifiers if mod.type == 'ARMATURE']:
+        dup.modifiers.remove(mod)
+    copy_armature_modifiers(obj, dup)
+
 class SM2_OT_DuplicateLODs(bpy.types.Operator):
     bl_idname = "object.sm2_duplicate_lods"
     bl_label = "Make LODs"
     bl_description = "Duplicate selected objects 5 times, preserve armatures, and add decimate modifiers"
     bl_options = {'REGISTER', 'UNDO'}
 
+    method: bpy.props.EnumProperty(
+        name="Method",
+        items=[
+            ('DECIMATE', "Decimate Modifier", "Stack Blender Decimate modifiers per LOD"),
+            ('QEM', "Quadric Simplifier", "Built-in quadric simplifier with triangle budgets, keeps UV seams, material borders and weights"),
+        ],
+        default='DECIMATE',
+    )
+    lod_count: bpy.props.IntProperty(name="LOD Count", default=5, min=1, max=MAX_LODS)
+    ratio: bpy.props.FloatProperty(name="Ratio per LOD", default=0.5, min=0.01, max=1.0)
+    triangle_budgets: bpy.props.StringProperty(
+        name="Triangle Budgets",
+        description="Comma separated triangle counts for LOD1, LOD2, ... (Quadric only). Empty uses the ratio",
+        default="",
+    )
+    preserve_uv_seams: bpy.props.BoolProperty(name="Keep UV Seams", default=True)
+    preserve_materials: bpy.props.BoolProperty(name="Keep Material Borders", default=True)
+    respect_weights: bpy.props.BoolProperty(name="Keep Weight Borders", default=True)
+    use_parallel: bpy.props.BoolProperty(
+        name="Parallel",
+        description="Simplify selected meshes in background Blender processes (Quadric only)",
+        default=False,
+    )
+    use_proxies: bpy.props.BoolProperty(
+        name="Lightweight Proxies",
+        description="Keep LODs as proxies sharing the source mesh, the reduced meshes are built on export or with Bake LOD Proxies",
+        default=False,
+    )
+    use_cache: bpy.props.BoolProperty(
+        name="Reuse Up To Date LODs",
+        description="Skip LODs whose source mesh and settings haven't changed, refresh the others in place",
+        default=True,
+    )
+    worker_count: bpy.props.IntProperty(
+        name="Workers",
+        description="Number of worker processes, 0 uses all cores",
+        default=0,
+        min=0,
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "method")
+        layout.prop(self, "lod_count")
+        layout.prop(self, "ratio")
+        layout.prop(self, "use_cache")
+        layout.prop(self, "use_proxies")
+        if self.method == 'QEM':
+            layout.prop(self, "triangle_budgets")
+            layout.prop(self, "preserve_uv_seams")
+            layout.prop(self, "preserve_materials")
+            layout.prop(self, "respect_weights")
+            layout.prop(self, "use_parallel")
+            if self.use_parallel:
+                layout.prop(self, "worker_count")
+
+    def simplify_options(self):
+        return {key: getattr(self, key) for key in SIMPLIFY_OPTION_KEYS}
+
+    def lod_targets(self, tri_count):
+        return parse_triangle_budgets(self.triangle_budgets, tri_count, self.lod_count, self.ratio)
+
+    def check_budgets(self):
+        # Checked once up front, proxies store the text and parse it again on export
+        try:
+            parse_triangle_budgets(self.triangle_budgets, 0, self.lod_count, self.ratio)
+        except ValueError:
+            self.report({'WARNING'}, f"Invalid triangle budgets '{self.triangle_budgets}', using ratio.")
+            self.triangle_budgets = ""
+
+    def simplify(self, obj):
+        arrays = read_mesh_arrays(obj.data, bool(obj.vertex_groups))
+        return qem_simplify(arrays, self.lod_targets(len(arrays["tris"])), **self.simplify_options())
+
+    def simplify_all(self, objects):
+        # Returns {object name: lods}
+        if not self.use_parallel or len(objects) < 2:
+            return {obj.name: self.simplify(obj) for obj in objects}
+
+        worker_count = self.worker_count or os.cpu_count() or 1
+        work_dir = tempfile.mkdtemp(prefix="sm2_lod_")
+        try:
+            jobs = []
+            for n, obj in enumerate(objects):
+                arrays = read_mesh_arrays(obj.data, bool(obj.vertex_groups))
+                job = {
+                    "name": obj.name,
+                    "input": os.path.join(work_dir, f"mesh_{n}.npz"),
+                    "output": os.path.join(work_dir, f"lods_{n}.npz"),
+                    "tris": len(arrays["tris"]),
+                    "targets": self.lod_targets(len(arrays["tris"])),
+                }
+                save_arrays(job["input"], arrays)
+                jobs.append(job)
+
+            failed = simplify_parallel(jobs, self.simplify_options(), min(worker_count, len(jobs)))
+            if failed:
+                self.report({'WARNING'}, f"{len(failed)} LOD job(s) failed in workers, redoing them here.")
+
+            results = {}
+            for job in jobs:
+                if job in failed:
+                    lods = qem_simplify(load_arrays(job["input"]), job["targets"], **self.simplify_options())
+                else:
+                    lods = load_lods(job["output"])
+                results[job["name"]] = lods
+            return results
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def settings(self):
+        # Everything that changes the generated LODs
+        settings = {
+            "method": self.method,
+            "lod_count": self.lod_count,
+            "ratio": round(self.ratio, 6),
+        }
+        if self.method == 'QEM':
+            settings["triangle_budgets"] = self.triangle_budgets
+            settings.update(self.simplify_options())
+        if self.use_proxies:
+            settings["proxy"] = True
+        return settings
+
+    def build_lod(self, context, obj, lod_name, level, lods, dup):
+        # Create a new LOD object, or refresh an existing one in place
+        if dup is None:
+            dup = obj.copy()
+
+            context.collection.objects.link(dup)
+            dup.parent = obj
+            dup.name = lod_name
+            for key in LOD_OWN_KEYS & set(dup.keys()):
+                del dup[key]
+
+        sync_lod_object(obj, dup)
+        if dup.type != 'MESH':
+            return dup
+
+        if self.use_proxies:
+            # Share the source mesh, the real LOD is built on export or bake
+            sync_vertex_groups(obj, dup)
+            replace_mesh_data(dup, obj.data)
+            dup[LOD_PROXY_KEY] = json.dumps(self.settings(), sort_keys=True)
+            return dup
+
+        if LOD_PROXY_KEY in dup:
+            del dup[LOD_PROXY_KEY]
+        fill_lod_mesh(obj, dup, lod_name, level, self.ratio, lods)
+        return dup
+
     def execute(self, context):
         selected_objects = [
             obj for obj in context.selected_objects
-            if obj.type in {'MESH', 'EMPTY'}
+            if obj.type in {'MESH', 'EMPTY'} and LOD_LEVEL_KEY not in obj
         ]
 
         if not selected_objects:
             self.report({'WARNING'}, "No mesh or empty objects selected.")
             return {'CANCELLED'}
+        if self.method == 'QEM':
+            self.check_budgets()
 
+        # Work out which levels are missing or out of date
+        settings = self.settings()
+        plans = []
         for obj in selected_objects:
             base_name = clean_blender_suffix(obj.name)
+            existing = {}
+            content_hash = None
+            if self.use_cache:
+                existing = find_lod_children(obj, base_name, self.lod_count, remove_extras=True)
+                content_hash = lod_settings_hash(obj, settings)
+            stale = [
+                i for i in range(1, self.lod_count + 1)
+                if i not in existing or existing[i].get(LOD_HASH_KEY) != content_hash
+            ]
+            plans.append((obj, base_name, existing, content_hash, stale))
+
+        lods_by_name = {}
+        if self.method == 'QEM' and not self.use_proxies:
+            lods_by_name = self.simplify_all([
+                obj for obj, _, _, _, stale in plans
+                if obj.type == 'MESH' and stale
+            ])
+
+        built = reused = 0
+        for obj, base_name, existing, content_hash, stale in plans:
+            lods = lods_by_name.get(obj.name)
+            for i in stale:
+                dup = self.build_lod(context, obj, f"{base_name}_lod{i}", i, lods, existing.get(i))
+                dup[LOD_LEVEL_KEY] = i
+                if content_hash is not None:
+                    dup[LOD_HASH_KEY] = content_hash
+                built += 1
+            reused += self.lod_count - len(stale)
+            if content_hash is not None:
+                obj[LOD_HASH_KEY] = content_hash
+
+        self.report({'INFO'}, f"Built {built} LOD(s), {reused} already up to date.")
+        return {'FINISHED'}
+
+class SM2_OT_OptimizeVertexCache(bpy.types.Operator):
+    """Reorder triangles and vertices of meshes for GPU vertex cache reuse"""
+    bl_idname = "object.sm2_optimize_vertex_cache"
+    bl_label = "Optimize Vertex Cache"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scope: bpy.props.EnumProperty(
+        name="Meshes",
+        items=[
+            ('SELECTED', "Selected", "Selected mesh objects"),
+            ('ALL', "All", "Every mesh in the file"),
+        ],
+        default='SELECTED',
+    )
+    temporary: bpy.props.BoolProperty(
+        name="Temporary",
+        description="Reorder copies of the selected meshes until Restore Vertex Cache Meshes, skipping meshes used by vertex index (used by exporters)",
+        default=False,
+        options={'SKIP_SAVE'},
+    )
+
+    def execute(self, context):
+        if self.temporary:
+            results, skipped = optimize_for_export(context.selected_objects)
+            for name in skipped:
+                print(f"[SM2 Vertex Cache] {name}: kept as is, hooks, binds or vertex parents use its vertex order")
+            for name, (before, after) in results.items():
+                print(f"[SM2 Vertex Cache] {name} (export copy): ACMR {before:.3f} -> {after:.3f}")
+            average = ""
+            if results:
+                total_before = sum(before for before, _after in results.values())
+                total_after = sum(after for _before, after in results.values())
+                average = f", average ACMR {total_before / len(results):.3f} -> {total_after / len(results):.3f}"
+            self.report({'INFO'}, f"Optimized {len(results)} mesh copy(ies) for export{average}, {len(skipped)} object(s) skipped.")
+            return {'FINISHED'}
+        if self.scope == 'ALL':
+            meshes = [mesh for mesh in bpy.data.meshes if mesh.users]
+        else:
+            meshes = list({obj.data for obj in context.selected_objects if obj.type == 'MESH'})
+        if not meshes:
+            self.report({'WARNING'}, "No meshes to optimize.")
+            return {'CANCELLED'}
+
+        total_before = total_after = 0.0
+        for mesh in meshes:
+            before, after = optimize_vertex_cache(mesh)
+            total_before += before
+            total_after += after
+            print(f"[SM2 Vertex Cache] {mesh.name}: ACMR {before:.3f} -> {after:.3f}")
+
+        self.report({'INFO'}, (
+            f"Optimized {len(meshes)} mesh(es), "
+            f"average ACMR {total_before / len(meshes):.3f} -> {total_after / len(meshes):.3f} "
+            f"(per mesh in the console)."
+        ))
+        return {'FINISHED'}
+
+class SM2_OT_RestoreVertexCache(bpy.types.Operator):
+    """Give objects back their original meshes after a temporary vertex cache optimization"""
+    bl_idname = "object.sm2_restore_vertex_cache"
+    bl_label = "Restore Vertex Cache Meshes"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        count = restore_vertex_cache()
+        self.report({'INFO'}, f"Restored {count} object(s).")
+        return {'FINISHED'}
+
+class SM2_OT_LODDistances(bpy.types.Operator):
+    """Work out LOD switch distances from bounds and triangle counts and store them as custom properties"""
+    bl_idname = "object.sm2_lod_distances"
+    bl_label = "Compute LOD Distances"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    fov: bpy.props.FloatProperty(
+        name="Field of View",
+        subtype='ANGLE',
+        description="Vertical field of view of the game camera",
+        default=math.radians(60.0),
+        min=math.radians(1.0),
+        max=math.radians(170.0),
+    )
+    screen_height: bpy.props.IntProperty(name="Screen Height (px)", default=1080, min=1)
+    pixels_per_triangle: bpy.props.FloatProperty(
+        name="Pixels per Triangle",
+        description="Switch to the next LOD once triangles get smaller than this on screen",
+        default=10.0,
+        min=0.1,
+    )
+
+    def execute(self, context):
+        sources = [
+            obj for obj in context.selected_objects
+            if LOD_LEVEL_KEY not in obj and has_lod_children(obj)
+        ]
+        if not sources:
+            self.report({'WARNING'}, "No selected mesh with LODs.")
+            return {'CANCELLED'}
+
+        for obj in sources:
+            rows = lod_thresholds(obj, self.fov, self.screen_height, self.pixels_per_triangle)
+            write_lod_thresholds(obj, rows)
+
+        self.report({'INFO'}, f"Stored LOD distances on {len(sources)} object(s). Enable custom properties in the glTF export to keep them.")
+        return {'FINISHED'}
+
+class SM2_OT_LODReport(bpy.types.Operator):
+    """Report triangle counts and surface error of each LOD against LOD0"""
+    bl_idname = "object.sm2_lod_report"
+    bl_label = "LOD Report"
+    bl_options = {'REGISTER'}
+
+    sample_count: bpy.props.IntProperty(name="Samples", default=20000, min=100)
+    write_csv: bpy.props.BoolProperty(name="Write CSV", default=True)
+    directory: bpy.props.StringProperty(
+        name="CSV Folder",
+        subtype='DIR_PATH',
+        description="Folder for <object>_lod_report.csv files, relative paths start at the .blend",
+        default="//",
+    )
+
+    def execute(self, context):
+        sources = [
+            obj for obj in context.selected_objects
+            if LOD_LEVEL_KEY not in obj and has_lod_children(obj)
+        ]
+        if not sources:
+            self.report({'WARNING'}, "No selected mesh with LODs.")
+            return {'CANCELLED'}
+
+        directory = bpy.path.abspath(self.directory)
+        if self.write_csv and (not directory or directory.startswith("//")):
+            self.report({'ERROR'}, "Save the .blend or pick an absolute CSV folder.")
+            return {'CANCELLED'}
 
-            for i in range(1, 6):
-                lod_name = f"{base_name}_lod{i}"
-                dup = obj.copy()
-
-                if obj.type == 'MESH':
-                    dup.data = obj.data.copy()
-
-                context.collection.objects.link(dup)
-                dup.parent = obj
-                dup.name = lod_name
-
-                if dup.type == 'MESH':
-                    # Copy Armature modifiers
-                    for mod in obj.modifiers:
-                        if mod.type == 'ARMATURE':
-                            new_mod = dup.modifiers.new(name=mod.name, type='ARMATURE')
-                            new_mod.object = mod.object
-                            new_mod.use_vertex_groups = mod.use_vertex_groups
-                            new_mod.use_deform_preserve_volume = mod.use_deform_preserve_volume
-
-                    # Add decimate modifiers
-                    for j in range(i):
-                        decimod = dup.modifiers.new(name=f"Decimate_{j+1}", type='DECIMATE')
-                        decimod.ratio = 0.5
-
-                    # Apply only decimate modifiers
-                    bpy.context.view_layer.objects.active = dup
-                    dup.select_set(True)
-                    for mod in list(dup.modifiers):
-                        if mod.type == 'DECIMATE':
-                            bpy.ops.object.modifier_apply(modifier=mod.name)
-                    dup.select_set(False)
+        start = time.perf_counter()
+        proxies = 0
+        for obj in sources:
+            rows = lod_report(obj, self.sample_count)
+            _lod_reports[obj.name] = rows
+            proxies += sum(LOD_PROXY_KEY in child for child in find_lod_children(obj, clean_blender_suffix(obj.name), MAX_LODS).values())
+            if self.write_csv:
+                os.makedirs(directory, exist_ok=True)
+                write_report_csv(os.path.join(directory, f"{clean_blender_suffix(obj.name)}_lod_report.csv"), rows)
 
+        message = f"LOD report for {len(sources)} object(s) in {time.perf_counter() - start:.2f}s."
+        if proxies:
+            message += f" {proxies} LOD proxy(ies) left out, bake them to include them."
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+class SM2_OT_MaterializeLODProxies(bpy.types.Operator):
+    """Build the real reduced meshes for lightweight LOD proxies"""
+    bl_idname = "object.sm2_materialize_lod_proxies"
+    bl_label = "Bake LOD Proxies"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    temporary: bpy.props.BoolProperty(
+        name="Temporary",
+        description="Remember the proxies so Restore LOD Proxies can turn them back, and hold back the LOD cache properties until then (used by exporters)",
+        default=False,
+        options={'SKIP_SAVE'},
+    )
+
+    def execute(self, context):
+        count = materialize_lod_proxies(find_lod_proxies(), self.temporary)
+        if self.temporary:
+            stash_lod_state()
+        self.report({'INFO'}, f"Built {count} LOD proxy mesh(es).")
+        return {'FINISHED'}
+
+class SM2_OT_RestoreLODProxies(bpy.types.Operator):
+    """Turn LODs built for an export back into lightweight proxies"""
+    bl_idname = "object.sm2_restore_lod_proxies"
+    bl_label = "Restore LOD Proxies"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        count = restore_lod_proxies()
+        restore_lod_state()
+        self.report({'INFO'}, f"Restored {count} LOD proxy(ies).")
         return {'FINISHED'}
 
 class SM2_PT_LODPanel(bpy.types.Panel):
@@ -79,9 +1677,39 @@ class SM2_PT_LODPanel(bpy.types.Panel):
     def draw(self, context):
         layout = self.layout
         layout.operator("object.sm2_duplicate_lods", text="Make LODs", icon='MOD_DECIM')
+        op = layout.operator("object.sm2_duplicate_lods", text="Make LODs (Quadric)", icon='MOD_DECIM')
+        op.method = 'QEM'
+        op = layout.operator("object.sm2_duplicate_lods", text="Make LODs (Quadric, Parallel)", icon='MOD_DECIM')
+        op.method = 'QEM'
+        op.use_parallel = True
+        layout.operator("object.sm2_materialize_lod_proxies", icon='MESH_DATA')
+        layout.operator("object.sm2_lod_report", icon='INFO')
+        layout.operator("object.sm2_lod_distances", icon='DRIVER_DISTANCE')
+        layout.operator("object.sm2_optimize_vertex_cache", icon='SORTSIZE')
+
+        obj = context.active_object
+        rows = _lod_reports.get(obj.name) if obj else None
+        if rows:
+            box = layout.box()
+            header = box.row()
+            for title in ("LOD", "Tris", "Ratio", "Max Err %", "RMS"):
+                header.label(text=title)
+            for r in rows:
+                row = box.row()
+                row.label(text=str(r["level"]))
+                row.label(text=str(r["tris"]))
+                row.label(text=f"{r['ratio']:.3f}")
+                row.label(text=f"{r['hausdorff_pct']:.3f}")
+                row.label(text=f"{r['rms']:.4f}")
 
 classes = (
     SM2_OT_DuplicateLODs,
+    SM2_OT_OptimizeVertexCache,
+    SM2_OT_RestoreVertexCache,
+    SM2_OT_LODDistances,
+    SM2_OT_LODReport,
+    SM2_OT_MaterializeLODProxies,
+    SM2_OT_RestoreLODProxies,
     SM2_PT_LODPanel,
 )
 
@@ -94,4 +1722,11 @@ def unregister():
         bpy.utils.unregister_class(cls)
 
 if __name__ == "__main__":
-    register()
+    if "--sm2-lod-worker" in sys.argv:
+        run_lod_worker(sys.argv[sys.argv.index("--sm2-lod-worker") + 1])
+    elif "--sm2-lod-report-benchmark" in sys.argv:
+        run_report_benchmark(sys.argv[sys.argv.index("--sm2-lod-report-benchmark") + 1:])
+    elif "--sm2-lod-simplify-benchmark" in sys.argv:
+        run_simplify_benchmark(sys.argv[sys.argv.index("--sm2-lod-simplify-benchmark") + 1:])
+    else:
+        register()
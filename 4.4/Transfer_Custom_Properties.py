@@ -3,37 +3,502 @@ bl_info = {
     "blender": (4, 4, 0),
     "category": "SM2 Tools",
     "author": "violet :3",
-    "version": (1, 2, 0),
+    "version": (1, 7, 0),
     "description": "Transfers custom properties from the active object or bone to others, including pose bone display settings.",
 }
 
 import bpy
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from bpy.app.handlers import persistent
+from mathutils import Vector
+from mathutils.kdtree import KDTree
 
-def copy_custom_properties(source, target):
-    for key in list(target.keys()):
-        if key not in {'_RNA_UI'}:
-            del target[key]
-    for key, value in source.items():
-        if key not in {'_RNA_UI'}:
+# UI data and the LOD maker's cache keys aren't template properties
+EXCLUDED_KEYS = {'_RNA_UI', 'sm2_lod_hash', 'sm2_lod_level', 'sm2_lod_proxy'}
+
+def snapshot_custom_properties(source):
+    # Plain Python copy of the source's properties, taken once per transfer
+    props = source.id_properties_ensure().to_dict()
+    return {key: value for key, value in props.items() if key not in EXCLUDED_KEYS}
+
+def apply_custom_properties(snapshot, target, remove_unrelated=False):
+    """Write only missing or different keys. Returns True if the target changed."""
+    current = target.id_properties_ensure().to_dict()
+    changed = False
+    for key, value in snapshot.items():
+        if key not in current or current[key] != value:
             target[key] = value
+            changed = True
+    if remove_unrelated:
+        for key in current.keys() - snapshot.keys() - EXCLUDED_KEYS:
+            del target[key]
+            changed = True
+    return changed
+
+def copy_custom_properties(source, target, remove_unrelated=True):
+    return apply_custom_properties(snapshot_custom_properties(source), target, remove_unrelated)
+
+BONE_DISPLAY_PROPS = (
+    "custom_shape",
+    "custom_shape_scale",
+    "custom_shape_translation",
+    "custom_shape_rotation_euler",
+    "custom_shape_scale_xyz",
+    "bbone_x",
+    "bbone_z",
+    "bbone_handle_type_start",
+    "bbone_handle_type_end",
+    "bbone_custom_handle_start",
+    "bbone_custom_handle_end",
+)
+
+NUMERIC_DTYPES = {'FLOAT': np.float32, 'INT': np.int32, 'BOOLEAN': bool}
+
+# bl_rna identifier -> (numeric props [(name, size, dtype)], other props)
+_display_prop_cache = {}
+
+def resolve_display_props(struct):
+    """Split the display props that exist on a struct type into foreach-able and other ones."""
+    rna = struct.bl_rna
+    if rna.identifier not in _display_prop_cache:
+        numeric, other = [], []
+        for name in BONE_DISPLAY_PROPS:
+            prop = rna.properties.get(name)
+            if prop is None or prop.is_readonly:
+                continue
+            if prop.type in NUMERIC_DTYPES:
+                numeric.append((name, max(1, prop.array_length), NUMERIC_DTYPES[prop.type]))
+            else:
+                other.append(name)
+        _display_prop_cache[rna.identifier] = (numeric, other)
+    return _display_prop_cache[rna.identifier]
+
+def bulk_copy_display_settings(collection, source_index, target_indices):
+    """Copy display settings from one item of a bone collection to many.
+
+    Numeric props go through one foreach_get/foreach_set per property, the
+    rest (shapes, enums) are only set where they differ.
+    """
+    if not len(collection) or not target_indices:
+        return
+    numeric, other = resolve_display_props(collection[source_index])
+    count = len(collection)
+    targets = np.array(target_indices, dtype=np.int64)
+
+    for name, size, dtype in numeric:
+        values = np.empty(count * size, dtype=dtype)
+        collection.foreach_get(name, values)
+        values = values.reshape(count, size)
+        if np.all(values[targets] == values[source_index]):
+            continue
+        values[targets] = values[source_index]
+        collection.foreach_set(name, values.ravel())
+
+    source = collection[source_index]
+    for name in other:
+        value = getattr(source, name)
+        for i in target_indices:
+            target = collection[i]
+            if getattr(target, name) != value:
+                setattr(target, name, value)
+
+def copy_display_settings_by_name(collection, source_name, target_names):
+    index = {item.name: i for i, item in enumerate(collection)}
+    bulk_copy_display_settings(collection, index[source_name], [index[name] for name in target_names])
+
+def transfer_bone_settings(armature_obj, source_name, target_names, remove_unrelated=False):
+    """Copy custom properties and display settings between bones of one armature.
+
+    Works on pose bones and their bones together, so it needs no mode switch.
+    Returns (changed, unchanged) target counts for the custom properties.
+    """
+    pose_bones = armature_obj.pose.bones
+    bones = armature_obj.data.bones
+    target_names = [name for name in target_names if name != source_name]
+
+    changed = set()
+    for collection in (pose_bones, bones):
+        snapshot = snapshot_custom_properties(collection[source_name])
+        for name in target_names:
+            if apply_custom_properties(snapshot, collection[name], remove_unrelated):
+                changed.add(name)
+        copy_display_settings_by_name(collection, source_name, target_names)
+
+    return len(changed), len(target_names) - len(changed)
+
+def snapshot_object(source):
+    # Object and object data properties of a source, taken once
+    data_snapshot = snapshot_custom_properties(source.data) if source.data is not None else None
+    return snapshot_custom_properties(source), data_snapshot
+
+def apply_object_snapshot(source, snapshots, target, done_data, remove_unrelated=False):
+    snapshot, data_snapshot = snapshots
+    changed = apply_custom_properties(snapshot, target, remove_unrelated)
+    data = target.data
+    if data_snapshot is not None and data is not None and data != source.data and data not in done_data:
+        done_data.add(data)
+        changed |= apply_custom_properties(data_snapshot, data, remove_unrelated)
+    return changed
+
+def transfer_object_properties(source, targets, remove_unrelated=False):
+    """Copy object and object data properties to targets of the same type.
+
+    Returns (changed, unchanged) target counts.
+    """
+    snapshots = snapshot_object(source)
+    done_data = set()
+    changed = unchanged = 0
+    for target in targets:
+        if target == source or source.type != target.type:
+            continue
+        if apply_object_snapshot(source, snapshots, target, done_data, remove_unrelated):
+            changed += 1
+        else:
+            unchanged += 1
+    return changed, unchanged
+
+# ------------------ Spatial matching ------------------
+
+def world_bounds(obj):
+    corners = [obj.matrix_world @ Vector(c) for c in obj.bound_box]
+    return Vector(map(min, zip(*corners))), Vector(map(max, zip(*corners)))
 
-def copy_bone_display_settings(source_bone, target_bone):
-    display_props = [
-        "custom_shape",
-        "custom_shape_scale",
-        "custom_shape_translation",
-        "custom_shape_rotation_euler",
-        "custom_shape_scale_xyz",
-        "bbone_x",
-        "bbone_z",
-        "bbone_handle_type_start",
-        "bbone_handle_type_end",
-        "bbone_custom_handle_start",
-        "bbone_custom_handle_end",
+def contains_point(obj, point, tolerance):
+    # Test in the object's own space so rotated boxes work
+    local = obj.matrix_world.inverted_safe() @ point
+    corners = obj.bound_box
+    lo = [min(c[i] for c in corners) - tolerance for i in range(3)]
+    hi = [max(c[i] for c in corners) + tolerance for i in range(3)]
+    return all(lo[i] <= local[i] <= hi[i] for i in range(3))
+
+def containing_reach(obj, tolerance):
+    # World bounds centre and the distance from it that still lies in the box
+    # grown by tolerance (which contains_point applies in local space)
+    lo, hi = world_bounds(obj)
+    grow = tolerance * max(abs(v) for v in obj.matrix_world.to_scale()) * math.sqrt(3.0)
+    return (lo + hi) * 0.5, (hi - lo).length * 0.5 + grow, (hi - lo).length
+
+def size_class_trees(objs, tolerance):
+    """KD-trees over bounds centres, one per power-of-two reach.
+
+    Each query only searches a class with that class's largest reach, so one
+    huge template doesn't turn every lookup into a scan of all sources.
+    """
+    classes = {}
+    for i, obj in enumerate(objs):
+        center, reach, size = containing_reach(obj, tolerance)
+        key = math.ceil(math.log2(max(reach, 1e-6)))
+        classes.setdefault(key, []).append((i, center, reach, size))
+    trees = []
+    for members in classes.values():
+        tree = KDTree(len(members))
+        for i, center, _reach, _size in members:
+            tree.insert(center, i)
+        tree.balance()
+        trees.append((tree, max(m[2] for m in members)))
+    sizes = {i: size for members in classes.values() for i, _center, _reach, size in members}
+    return trees, sizes
+
+def match_by_location(sources, targets, mode, tolerance):
+    """Pair each target with a source of the same type using KD-trees.
+
+    NEAREST takes the closest source origin within tolerance. CONTAINING
+    takes the smallest source whose bounding box contains the target origin
+    (grown by tolerance), searching around the box centres so templates
+    with corner or base origins work. Returns {target: source}.
+    """
+    by_type = {}
+    for src in sources:
+        by_type.setdefault(src.type, []).append(src)
+
+    trees = {}
+    for obj_type, objs in by_type.items():
+        if mode == 'NEAREST':
+            tree = KDTree(len(objs))
+            for i, src in enumerate(objs):
+                tree.insert(src.matrix_world.translation, i)
+            tree.balance()
+            trees[obj_type] = (tree, objs)
+        else:
+            trees[obj_type] = (size_class_trees(objs, tolerance), objs)
+
+    matches = {}
+    for target in targets:
+        entry = trees.get(target.type)
+        if entry is None:
+            continue
+        point = target.matrix_world.translation
+
+        if mode == 'NEAREST':
+            tree, objs = entry
+            co, index, dist = tree.find(point)
+            if index is not None and dist <= tolerance and objs[index] != target:
+                matches[target] = objs[index]
+            continue
+
+        (class_trees, sizes), objs = entry
+        best = None
+        for tree, reach in class_trees:
+            for co, index, dist in tree.find_range(point, reach):
+                src = objs[index]
+                if src == target or not contains_point(src, point, tolerance):
+                    continue
+                if best is None or sizes[index] < sizes[best]:
+                    best = index
+        if best is not None:
+            matches[target] = objs[best]
+
+    return matches
+
+# ------------------ Template signature index ------------------
+
+# Scene name -> {"count": (scene, file) object counts when built, "groups": {(type, pattern): [object names]}}
+# Rebuilt when objects are added, removed or renamed, so repeated runs on an
+# unchanged scene reuse it. Property keys aren't part of the signature: targets
+# whose keys drifted from the template still match and can be cleaned up with
+# Remove Unrelated Properties.
+_signature_index = {}
+_rename_owner = object()
+
+def name_pattern(name):
+    # "locator_12.003" -> "locator_#": Blender suffix dropped, digit runs folded
+    return re.sub(r'\d+', '#', re.sub(r'\.\d+$', '', name))
+
+def object_signature(obj):
+    return obj.type, name_pattern(obj.name)
+
+def object_counts(scene):
+    return len(scene.objects), len(bpy.data.objects)
+
+def build_signature_index(scene):
+    groups = {}
+    for obj in scene.objects:
+        groups.setdefault(object_signature(obj), []).append(obj.name)
+    index = {"count": object_counts(scene), "groups": groups}
+    _signature_index[scene.name] = index
+    return index
+
+def get_signature_index(scene):
+    # Rebuilt after a rename or when objects were added or removed, otherwise reused as is
+    index = _signature_index.get(scene.name)
+    if index is None or index["count"] != object_counts(scene):
+        index = build_signature_index(scene)
+    return index
+
+def find_matching_objects(scene, template):
+    """Objects with the template's type and name pattern."""
+    signature = object_signature(template)
+    for _ in range(2):
+        names = get_signature_index(scene)["groups"].get(signature, [])
+        objects = [scene.objects.get(name) for name in names]
+        if all(obj is not None for obj in objects):
+            break
+        # Something was renamed since the index was built
+        build_signature_index(scene)
+    return [
+        obj for obj in objects
+        if obj is not None and obj != template
+        and object_signature(obj) == signature
     ]
-    for prop in display_props:
-        if hasattr(source_bone, prop) and hasattr(target_bone, prop):
-            setattr(target_bone, prop, getattr(source_bone, prop))
+
+def invalidate_signature_index(*args):
+    _signature_index.clear()
+
+def subscribe_renames():
+    # Renames keep the object count, the message bus sees them
+    bpy.msgbus.subscribe_rna(key=(bpy.types.Object, "name"), owner=_rename_owner, args=(), notify=invalidate_signature_index)
+
+@persistent
+def signature_index_load_post(*args):
+    # Message bus subscriptions don't survive loading a file
+    _signature_index.clear()
+    subscribe_renames()
+
+# ------------------ Headless propagation ------------------
+
+def json_safe(props):
+    # Drop values JSON can't hold (ID pointers and the like)
+    safe = {}
+    for key, value in props.items():
+        try:
+            json.dumps(value)
+        except TypeError:
+            print(f"[SM2 Propagate] Skipping property '{key}', it can't be stored as JSON.")
+            continue
+        safe[key] = value
+    return safe
+
+def template_to_dict(obj):
+    """Template description used by the headless propagation.
+
+    {"type": "EMPTY", "pattern": "locator_#", "object": {...}, "data": {...}}
+    """
+    snapshot, data_snapshot = snapshot_object(obj)
+    return {
+        "type": obj.type,
+        "pattern": name_pattern(obj.name),
+        "object": json_safe(snapshot),
+        "data": json_safe(data_snapshot) if data_snapshot is not None else None,
+    }
+
+def load_template(spec, args):
+    """Template from 'library.blend:ObjectName' or a JSON file.
+
+    The JSON may be a full template_to_dict() dump or a plain to_dict() of
+    object properties, in which case --type and --pattern pick the targets.
+    """
+    if spec.lower().endswith(".json"):
+        with open(spec, "r", encoding="utf-8") as f:
+            template = json.load(f)
+        if "object" not in template:
+            template = {"object": template, "data": None}
+    else:
+        path, _, name = spec.rpartition(":")
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            if name not in data_from.objects:
+                raise ValueError(f"Object '{name}' not found in {path}")
+            data_to.objects = [name]
+        obj = data_to.objects[0]
+        template = template_to_dict(obj)
+        bpy.data.objects.remove(obj)
+
+    if args.type:
+        template["type"] = args.type
+    if args.pattern:
+        template["pattern"] = args.pattern
+    if not template.get("type") or not template.get("pattern"):
+        raise ValueError("Template needs a type and name pattern (use --type and --pattern)")
+    return template
+
+def apply_template(template, remove_unrelated=False):
+    """Apply a template to every object of the open file with its type and
+    name pattern. Keys the template no longer has are kept unless
+    remove_unrelated is set."""
+    done_data = set()
+    changed = unchanged = 0
+    for obj in bpy.data.objects:
+        if obj.type != template["type"] or name_pattern(obj.name) != template["pattern"]:
+            continue
+        obj_changed = apply_custom_properties(template["object"], obj, remove_unrelated)
+        data = obj.data
+        if template.get("data") is not None and data is not None and data not in done_data:
+            done_data.add(data)
+            obj_changed |= apply_custom_properties(template["data"], data, remove_unrelated)
+        if obj_changed:
+            changed += 1
+        else:
+            unchanged += 1
+    return changed, unchanged
+
+def run_propagate_worker(args):
+    # Runs inside `blender -b file.blend`, the file is already open
+    with open(args.template_json, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    result = {"file": bpy.data.filepath, "changed": 0, "unchanged": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        result["changed"], result["unchanged"] = apply_template(template, args.remove_unrelated)
+        if result["changed"] and not args.dry_run:
+            bpy.ops.wm.save_mainfile()
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    return 1 if result["error"] else 0
+
+def run_propagate(args):
+    """Push a template into many .blend files with a pool of Blender workers.
+
+    blender -b --python Transfer_Custom_Properties.py -- --sm2-propagate
+        --template lib.blend:locator_01 --files "kitbash/**/*.blend" [--workers 4]
+    """
+    template = load_template(args.template, args)
+    files = sorted(set(glob.glob(args.files, recursive=True)))
+    if not files:
+        print(f"[SM2 Propagate] No files match {args.files}")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix="sm2_propagate_")
+    try:
+        template_json = os.path.join(work_dir, "template.json")
+        with open(template_json, "w", encoding="utf-8") as f:
+            json.dump(template, f)
+
+        def process(n, path):
+            result_path = os.path.join(work_dir, f"result_{n}.json")
+            cmd = [
+                bpy.app.binary_path, "-b", "--factory-startup", path,
+                "--python", os.path.abspath(__file__),
+                "--", "--sm2-propagate-worker", template_json, "--result", result_path,
+            ]
+            if args.remove_unrelated:
+                cmd.append("--remove-unrelated")
+            if args.dry_run:
+                cmd.append("--dry-run")
+            proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if os.path.isfile(result_path):
+                with open(result_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            return {"file": path, "changed": 0, "unchanged": 0, "seconds": 0.0,
+                    "error": f"worker exited with {proc.returncode}: {proc.stderr.strip()[-200:]}"}
+
+        start = time.perf_counter()
+        workers = args.workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(process, range(len(files)), files))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failed = 0
+    for result in results:
+        if result["error"]:
+            failed += 1
+            print(f"[SM2 Propagate] FAILED {result['file']}: {result['error']}")
+        else:
+            print(f"[SM2 Propagate] {result['file']}: {result['changed']} changed, "
+                  f"{result['unchanged']} unchanged ({result['seconds']:.2f}s)")
+    print(f"[SM2 Propagate] {len(files)} file(s), {failed} failed, "
+          f"{sum(r['changed'] for r in results)} object(s) changed in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+def parse_cli_args(argv):
+    parser = argparse.ArgumentParser(prog="Transfer_Custom_Properties.py")
+    parser.add_argument("--sm2-propagate", action="store_true")
+    parser.add_argument("--sm2-propagate-worker", dest="template_json")
+    parser.add_argument("--template", help="library.blend:ObjectName or template .json")
+    parser.add_argument("--files", help="Glob of .blend files, ** allowed")
+    parser.add_argument("--type", help="Object type of the targets (for plain property JSON)")
+    parser.add_argument("--pattern", help="Name pattern of the targets, e.g. locator_#")
+    parser.add_argument("--workers", type=int, default=0, help="Blender processes at once, 0 = all cores")
+    parser.add_argument("--remove-unrelated", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="Don't save the files")
+    parser.add_argument("--result")
+    return parser.parse_args(argv)
+
+# Blender needs the enum item strings to stay referenced
+_bone_collection_items = []
+
+def bone_collection_items(self, context):
+    obj = context.active_object
+    _bone_collection_items[:] = [('NONE', "Selection", "Use the selected bones")]
+    if obj and obj.type == 'ARMATURE':
+        _bone_collection_items.extend(
+            (coll.name, coll.name, f"All bones in '{coll.name}'") for coll in obj.data.collections_all
+        )
+    return _bone_collection_items
 
 class OBJECT_OT_transfer_custom_properties(bpy.types.Operator):
     """Transfer custom properties from active to selected"""
@@ -41,46 +506,170 @@ class OBJECT_OT_transfer_custom_properties(bpy.types.Operator):
     bl_label = "Transfer Custom Properties"
     bl_options = {'REGISTER', 'UNDO'}
 
+    remove_unrelated: bpy.props.BoolProperty(
+        name="Remove Unrelated Properties",
+        description="Also delete properties on the targets that the source doesn't have",
+        default=False,
+    )
+    bone_collection: bpy.props.EnumProperty(
+        name="Bone Collection",
+        description="Transfer from the active bone to every bone in this collection, in any mode",
+        items=bone_collection_items,
+        options={'SKIP_SAVE'},
+    )
+
     def execute(self, context):
         obj = context.active_object
         if not obj:
             self.report({'ERROR'}, "No active object.")
             return {'CANCELLED'}
 
-        # Pose mode (pose bones)
-        if obj.type == 'ARMATURE' and obj.mode == 'POSE':
-            source = context.active_pose_bone
-            if not source:
-                self.report({'ERROR'}, "No active pose bone.")
-                return {'CANCELLED'}
+        changed = unchanged = 0
 
-            targets = [b for b in context.selected_pose_bones if b != source]
-            for target in targets:
-                copy_custom_properties(source, target)
-                copy_bone_display_settings(source, target)
+        use_collection = obj.type == 'ARMATURE' and self.bone_collection not in {'', 'NONE'}
+        coll = obj.data.collections_all.get(self.bone_collection) if use_collection else None
+        if use_collection and not coll:
+            self.report({'ERROR'}, f"No bone collection '{self.bone_collection}'.")
+            return {'CANCELLED'}
 
-        # Edit mode (edit bones)
-        elif obj.type == 'ARMATURE' and obj.mode == 'EDIT':
+        # Edit mode (edit bones), collection members come from the edit bones
+        # since Blender only syncs them to the collection when leaving edit mode
+        if obj.type == 'ARMATURE' and obj.mode == 'EDIT':
             source = context.active_bone
             if not source:
                 self.report({'ERROR'}, "No active edit bone.")
                 return {'CANCELLED'}
 
-            targets = [b for b in context.selected_editable_bones if b.name != source.name]
+            if coll:
+                targets = [b for b in obj.data.edit_bones if b != source and coll.name in b.collections]
+            else:
+                targets = [b for b in context.selected_editable_bones if b != source]
+            snapshot = snapshot_custom_properties(source)
             for target in targets:
-                copy_custom_properties(source, target)
+                if apply_custom_properties(snapshot, target, self.remove_unrelated):
+                    changed += 1
+                else:
+                    unchanged += 1
+
+        # Bone collection or pose mode selection: pose bones and bones together
+        elif obj.type == 'ARMATURE' and (coll or obj.mode == 'POSE'):
+            if coll:
+                source = obj.data.bones.active
+                target_names = [b.name for b in coll.bones]
+            else:
+                source = context.active_pose_bone
+                target_names = [b.name for b in context.selected_pose_bones]
+            if not source:
+                self.report({'ERROR'}, "No active bone." if coll else "No active pose bone.")
+                return {'CANCELLED'}
+            changed, unchanged = transfer_bone_settings(obj, source.name, target_names, self.remove_unrelated)
 
         # Object mode (meshes, armatures, etc.)
         else:
-            source = obj
-            targets = [o for o in context.selected_objects if o != source]
-            for target in targets:
-                if source.type == target.type:
-                    copy_custom_properties(source, target)
-                    if hasattr(source, "data") and hasattr(target, "data"):
-                        copy_custom_properties(source.data, target.data)
+            targets = [o for o in context.selected_objects if o != obj]
+            changed, unchanged = transfer_object_properties(obj, targets, self.remove_unrelated)
+
+        self.report({'INFO'}, f"Custom properties transferred to {changed} target(s), {unchanged} already up to date.")
+        return {'FINISHED'}
+
+class OBJECT_OT_transfer_custom_properties_matching(bpy.types.Operator):
+    """Transfer custom properties from the active template to every object of the same type and name pattern in the scene"""
+    bl_idname = "object.transfer_custom_properties_matching"
+    bl_label = "Transfer to All Matching"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    remove_unrelated: bpy.props.BoolProperty(
+        name="Remove Unrelated Properties",
+        description="Also delete properties on the targets that the source doesn't have",
+        default=False,
+    )
+    select_only: bpy.props.BoolProperty(
+        name="Select Only",
+        description="Select the matching objects instead of transferring",
+        default=False,
+        options={'SKIP_SAVE'},
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.mode == 'OBJECT'
+
+    def execute(self, context):
+        template = context.active_object
+        targets = find_matching_objects(context.scene, template)
+        if not targets:
+            self.report({'WARNING'}, f"No objects match '{name_pattern(template.name)}' ({template.type}).")
+            return {'CANCELLED'}
+
+        if self.select_only:
+            for obj in targets:
+                obj.select_set(True)
+            self.report({'INFO'}, f"Selected {len(targets)} matching object(s).")
+            return {'FINISHED'}
 
-        self.report({'INFO'}, "Custom properties transferred.")
+        changed, unchanged = transfer_object_properties(template, targets, self.remove_unrelated)
+        self.report({'INFO'}, f"Custom properties transferred to {changed} matching object(s), {unchanged} already up to date.")
+        return {'FINISHED'}
+
+class OBJECT_OT_transfer_custom_properties_nearest(bpy.types.Operator):
+    """Give each selected object the custom properties of the nearest or containing template"""
+    bl_idname = "object.transfer_custom_properties_nearest"
+    bl_label = "Transfer from Nearest Template"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: bpy.props.EnumProperty(
+        name="Match",
+        items=[
+            ('NEAREST', "Nearest", "Closest template origin within the tolerance"),
+            ('CONTAINING', "Containing", "Smallest template whose bounding box contains the object"),
+        ],
+        default='NEAREST',
+    )
+    tolerance: bpy.props.FloatProperty(name="Tolerance", default=0.01, min=0.0, subtype='DISTANCE', unit='LENGTH')
+    source_scope: bpy.props.EnumProperty(
+        name="Templates",
+        items=[
+            ('SELECTED', "Selected", "Selected objects that have custom properties"),
+            ('SCENE', "Scene", "Every object in the scene that has custom properties"),
+        ],
+        default='SELECTED',
+    )
+    remove_unrelated: bpy.props.BoolProperty(
+        name="Remove Unrelated Properties",
+        description="Also delete properties on the targets that the source doesn't have",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        pool = context.selected_objects if self.source_scope == 'SELECTED' else context.scene.objects
+        sources = [obj for obj in pool if set(obj.keys()) - EXCLUDED_KEYS]
+        source_set = set(sources)
+        targets = [obj for obj in context.selected_objects if obj not in source_set]
+        if not sources or not targets:
+            self.report({'WARNING'}, "Need templates with custom properties and selected objects without.")
+            return {'CANCELLED'}
+
+        matches = match_by_location(sources, targets, self.mode, self.tolerance)
+
+        snapshots = {}
+        done_data = set()
+        changed = unchanged = 0
+        for target, source in matches.items():
+            if source not in snapshots:
+                snapshots[source] = snapshot_object(source)
+            if apply_object_snapshot(source, snapshots[source], target, done_data, self.remove_unrelated):
+                changed += 1
+            else:
+                unchanged += 1
+
+        self.report({'INFO'}, (
+            f"Matched {len(matches)} of {len(targets)} object(s): "
+            f"{changed} updated, {unchanged} already up to date."
+        ))
         return {'FINISHED'}
 
 class OBJECT_PT_transfer_custom_properties_panel(bpy.types.Panel):
@@ -93,14 +682,38 @@ class OBJECT_PT_transfer_custom_properties_panel(bpy.types.Panel):
 
     def draw(self, context):
         self.layout.operator(OBJECT_OT_transfer_custom_properties.bl_idname)
+        self.layout.operator(OBJECT_OT_transfer_custom_properties_matching.bl_idname)
+        op = self.layout.operator(OBJECT_OT_transfer_custom_properties_matching.bl_idname, text="Select All Matching")
+        op.select_only = True
+        self.layout.operator(OBJECT_OT_transfer_custom_properties_nearest.bl_idname)
+        obj = context.active_object
+        if obj and obj.type == 'ARMATURE' and obj.data.collections_all:
+            self.layout.operator_menu_enum(
+                OBJECT_OT_transfer_custom_properties.bl_idname, "bone_collection",
+                text="Transfer to Bone Collection")
 
 def register():
     bpy.utils.register_class(OBJECT_OT_transfer_custom_properties)
+    bpy.utils.register_class(OBJECT_OT_transfer_custom_properties_matching)
+    bpy.utils.register_class(OBJECT_OT_transfer_custom_properties_nearest)
     bpy.utils.register_class(OBJECT_PT_transfer_custom_properties_panel)
+    bpy.app.handlers.load_post.append(signature_index_load_post)
+    subscribe_renames()
 
 def unregister():
     bpy.utils.unregister_class(OBJECT_OT_transfer_custom_properties)
+    bpy.utils.unregister_class(OBJECT_OT_transfer_custom_properties_matching)
+    bpy.utils.unregister_class(OBJECT_OT_transfer_custom_properties_nearest)
     bpy.utils.unregister_class(OBJECT_PT_transfer_custom_properties_panel)
+    if signature_index_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(signature_index_load_post)
+    bpy.msgbus.clear_by_owner(_rename_owner)
+    _signature_index.clear()
 
 if __name__ == "__main__":
-    register()
+    cli_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--sm2-propagate" in cli_args or "--sm2-propagate-worker" in cli_args:
+        args = parse_cli_args(cli_args)
+        sys.exit(run_propagate(args) if args.sm2_propagate else run_propagate_worker(args))
+    else:
+        register()
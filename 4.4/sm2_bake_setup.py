@@ -2,50 +2,1180 @@ bl_info = {
     "name": "Bake Shader Toggle",
     "blender": (4, 4, 0),
     "category": "SM2 Tools",
-    "version": (1, 3),
+    "version": (1, 11),
     "author": "violet :3",
     "description": "Toggles baking setup by changing shader output to use SM2 group bake outputs and sets bake settings. Connects _a/Base Color bake or _spec bake for baking."
 }
 
 import bpy
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from bpy.app.handlers import persistent
 
-class BAKE_OT_prepare(bpy.types.Operator):
-    bl_idname = "bake.prepare_shader"
-    bl_label = "Prepare SM2 Shader for Bake"
-    bl_options = {'REGISTER', 'UNDO'}
+GROUP_NAME_PREFIX = "SM2 Universal Shader"
+BASE_LABELS = ('base color', 'basecolor')
+BAKE_OUTPUTS = {'BSDF': 'BSDF', 'BASE': '_a/Base Color bake', 'SPEC': '_spec bake'}
+BAKE_MODE_VALUES = {'BSDF': 0.0, 'BASE': 1.0, 'SPEC': 2.0}
+SWITCH_PREFIX = "SM2 Bake "
+# Bake mode, texture role and image suffix of each queued pass
+BAKE_PASSES = (('BASE', 'base', "_a"), ('SPEC', 'spec', "_spec"))
+BAKE_MANIFEST = "sm2_bake_manifest.json"
+# Target role -> (float buffer, colour space). Base colour and spec masks are
+# display values, 8 bits per channel hold them without visible loss.
+BAKE_TARGET_FORMATS = {'base': (False, 'sRGB'), 'spec': (False, 'Non-Color')}
+# Unlinked texture node per pass the queue bakes into, and the flag on the
+# images it generated: only those are ever resized
+TARGET_PREFIX = "SM2 Target "
+TARGET_IMAGE_KEY = "sm2_bake_target"
+# Target images get their own name so they don't clash with the imported SM2
+# textures; the output file keeps the texture name, stored on the image
+TARGET_IMAGE_SUFFIX = "_bake"
+TARGET_FILE_KEY = "sm2_bake_file"
+MIN_BAKE_SIZE = 64
+# Seconds a parallel bake worker may run before it is stopped
+WORKER_TIMEOUT = 4 * 60 * 60
+BAKE_PROFILE_KEY = "sm2_bake_profile_backup"
+# SM2 group input -> atlas image suffix
+ATLAS_MAPS = (('base color / _a', "_a"), ('_spec', "_spec"), ('_cc', "_cc"), ('_n', "_nm"))
+FLAT_NORMAL = (0.5, 0.5, 1.0, 1.0)
+# An EMIT bake reads the shader once per texel: no sampling, denoising or bounces needed
+EMIT_BAKE_PROFILE = (
+    ("samples", 1),
+    ("use_adaptive_sampling", False),
+    ("use_denoising", False),
+    ("max_bounces", 0),
+    ("diffuse_bounces", 0),
+    ("glossy_bounces", 0),
+    ("transmission_bounces", 0),
+    ("volume_bounces", 0),
+    ("transparent_max_bounces", 0),
+    ("caustics_reflective", False),
+    ("caustics_refractive", False),
+    ("use_auto_tile", False),
+)
+# Node properties that don't change what a bake produces
+HASH_SKIP_PROPS = {
+    'name', 'label', 'location', 'location_absolute', 'width', 'height', 'dimensions', 'select',
+    'hide', 'color', 'use_custom_color', 'show_options', 'show_preview', 'show_texture', 'parent',
+}
 
-    def execute(self, context):
-        group_name_prefix = "SM2 Universal Shader"
-        for mat in bpy.data.materials:
-            if not mat.use_nodes:
+# ------------------ SM2 node index ------------------
+
+# Material name -> node names of the output, SM2 group and base/spec textures.
+# Entries are checked against the tree on use and rebuilt when it changed:
+# node and link counts, the roles' labels and what feeds the group's inputs.
+_sm2_index = {}
+
+def group_feeds(group):
+    # (input, node linked into it) for every linked input of the SM2 group
+    return [(sock.identifier, sock.links[0].from_node.name) for sock in group.inputs if sock.is_linked]
+
+def build_sm2_entry(mat):
+    tree = mat.node_tree
+    nodes = tree.nodes
+    entry = {"count": len(nodes), "links": len(tree.links), "feeds": [],
+             "output": None, "group": None, "base": None, "spec": None}
+    for node in nodes:
+        if entry["output"] is None and isinstance(node, bpy.types.ShaderNodeOutputMaterial):
+            entry["output"] = node.name
+        elif entry["group"] is None and node.type == 'GROUP' and node.node_tree and node.node_tree.name.startswith(GROUP_NAME_PREFIX):
+            entry["group"] = node.name
+        elif node.type == 'TEX_IMAGE' and not node.name.startswith(TARGET_PREFIX):
+            if entry["base"] is None and node.label.lower() in BASE_LABELS:
+                entry["base"] = node.name
+            if entry["spec"] is None and '_spec' in node.name.lower():
+                entry["spec"] = node.name
+    if entry["group"] is not None:
+        entry["feeds"] = group_feeds(nodes[entry["group"]])
+    _sm2_index[mat.name] = entry
+    return entry
+
+def entry_valid(mat, entry):
+    tree = mat.node_tree
+    nodes = tree.nodes
+    if entry["count"] != len(nodes) or entry["links"] != len(tree.links):
+        return False
+    found = {}
+    for role in ("output", "group", "base", "spec"):
+        if entry[role] is not None:
+            found[role] = nodes.get(entry[role])
+            if found[role] is None:
+                return False
+    for role in ("base", "spec"):
+        if role in found and found[role].type != 'TEX_IMAGE':
+            return False
+    if "base" in found and found["base"].label.lower() not in BASE_LABELS:
+        return False
+    group = found.get("group")
+    if group is None:
+        return True
+    # A different node linked into the group (same link count) changes what gets baked
+    return (group.node_tree is not None and group.node_tree.name.startswith(GROUP_NAME_PREFIX)
+            and group_feeds(group) == entry["feeds"])
+
+def sm2_nodes(mat):
+    """Output, SM2 group, base and spec texture nodes of a material (or None)."""
+    if not mat.use_nodes or mat.node_tree is None:
+        return None
+    entry = _sm2_index.get(mat.name)
+    if entry is None or not entry_valid(mat, entry):
+        entry = build_sm2_entry(mat)
+    nodes = mat.node_tree.nodes
+    return {role: nodes.get(entry[role]) if entry[role] else None for role in ("output", "group", "base", "spec")}
+
+@persistent
+def clear_sm2_index(*_args):
+    _sm2_index.clear()
+
+def connect_surface(mat, found, output_name):
+    # Only relinks when the Surface input isn't already fed by that output
+    output_node, group_node = found["output"], found["group"]
+    if output_name not in group_node.outputs:
+        return False
+    source = group_node.outputs[output_name]
+    surface = output_node.inputs['Surface']
+    if len(surface.links) == 1 and surface.links[0].from_socket == source:
+        return False
+    links = mat.node_tree.links
+    for link in list(surface.links):
+        links.remove(link)
+    links.new(source, surface)
+    return True
+
+def set_bake_output(output_name, active_role=None):
+    """Point every SM2 material's Surface at a group output. Returns relinked count."""
+    relinked = 0
+    for mat in bpy.data.materials:
+        found = sm2_nodes(mat)
+        if found is None:
+            continue
+        if found["output"] and found["group"] and connect_surface(mat, found, output_name):
+            relinked += 1
+        if active_role and found[active_role] is not None:
+            found[active_role].select = True
+            mat.node_tree.nodes.active = found[active_role]
+    return relinked
+
+
+# ------------------ Bake mode switch ------------------
+
+# Optional switch built inside the shared SM2 group: the BSDF output is routed
+# through mix shaders driven by one "SM2 Bake Mode" value (0 BSDF, 1 base, 2 spec),
+# so changing mode is one value write instead of relinking every material.
+
+def sm2_groups():
+    return [g for g in bpy.data.node_groups if g.bl_idname == 'ShaderNodeTree' and g.name.startswith(GROUP_NAME_PREFIX)]
+
+def group_output_node(tree):
+    outputs = [n for n in tree.nodes if n.type == 'GROUP_OUTPUT']
+    return next((n for n in outputs if n.is_active_output), outputs[0] if outputs else None)
+
+def has_bake_switch(tree):
+    return tree.nodes.get(SWITCH_PREFIX + "Mode") is not None
+
+def bake_switch_groups():
+    return [g for g in sm2_groups() if has_bake_switch(g)]
+
+def as_shader(tree, socket, name, location):
+    if socket.type == 'SHADER':
+        return socket
+    emit = tree.nodes.new('ShaderNodeEmission')
+    emit.name = emit.label = SWITCH_PREFIX + name
+    emit.location = location
+    tree.links.new(socket, emit.inputs['Color'])
+    return emit.outputs['Emission']
+
+def install_bake_switch(tree):
+    """Route the group's BSDF output through the mode switch. Returns an error or None."""
+    if has_bake_switch(tree):
+        return None
+    out = group_output_node(tree)
+    if out is None:
+        return "no Group Output node"
+    sources = {}
+    for mode, name in BAKE_OUTPUTS.items():
+        socket = out.inputs.get(name)
+        if socket is None or not socket.is_linked:
+            return f"'{name}' output isn't linked"
+        sources[mode] = socket.links[0].from_socket
+
+    nodes, links = tree.nodes, tree.links
+    x, y = out.location.x - 600, out.location.y
+    mode = nodes.new('ShaderNodeValue')
+    mode.name = mode.label = SWITCH_PREFIX + "Mode"
+    mode.location = (x - 400, y - 200)
+    mode.outputs[0].default_value = 0.0
+
+    def compare_above(name, threshold, offset):
+        node = nodes.new('ShaderNodeMath')
+        node.name = node.label = SWITCH_PREFIX + name
+        node.operation = 'GREATER_THAN'
+        node.inputs[1].default_value = threshold
+        node.location = (x - 200, y - offset)
+        links.new(mode.outputs[0], node.inputs[0])
+        return node
+
+    is_bake = compare_above("Is Bake", 0.5, 100)
+    is_spec = compare_above("Is Spec", 1.5, 300)
+    base = as_shader(tree, sources['BASE'], "Base Emit", (x - 200, y - 450))
+    spec = as_shader(tree, sources['SPEC'], "Spec Emit", (x - 200, y - 600))
+
+    spec_mix = nodes.new('ShaderNodeMixShader')
+    spec_mix.name = spec_mix.label = SWITCH_PREFIX + "Spec Mix"
+    spec_mix.location = (x, y - 300)
+    links.new(is_spec.outputs[0], spec_mix.inputs[0])
+    links.new(base, spec_mix.inputs[1])
+    links.new(spec, spec_mix.inputs[2])
+
+    mix = nodes.new('ShaderNodeMixShader')
+    mix.name = mix.label = SWITCH_PREFIX + "Mix"
+    mix.location = (x + 200, y)
+    links.new(is_bake.outputs[0], mix.inputs[0])
+    links.new(sources['BSDF'], mix.inputs[1])
+    links.new(spec_mix.outputs[0], mix.inputs[2])
+    links.new(mix.outputs[0], out.inputs[BAKE_OUTPUTS['BSDF']])
+    return None
+
+def remove_bake_switch(tree):
+    mix = tree.nodes.get(SWITCH_PREFIX + "Mix")
+    out = group_output_node(tree)
+    if mix is not None and out is not None and mix.inputs[1].is_linked:
+        tree.links.new(mix.inputs[1].links[0].from_socket, out.inputs[BAKE_OUTPUTS['BSDF']])
+    for node in [n for n in tree.nodes if n.name.startswith(SWITCH_PREFIX)]:
+        tree.nodes.remove(node)
+
+def set_switch_mode(mode):
+    for tree in bake_switch_groups():
+        tree.nodes[SWITCH_PREFIX + "Mode"].outputs[0].default_value = BAKE_MODE_VALUES[mode]
+
+def update_bake_mode(self, context):
+    set_switch_mode(self.sm2_bake_mode)
+
+def apply_bake_mode(scene, mode, active_role=None):
+    """Switch every SM2 material to a bake mode, through the group switch when installed."""
+    scene.sm2_bake_mode = mode
+    if bake_switch_groups():
+        return set_bake_output(BAKE_OUTPUTS['BSDF'], active_role)
+    return set_bake_output(BAKE_OUTPUTS[mode], active_role)
+
+
+# ------------------ Bake profile ------------------
+
+def apply_bake_profile(scene):
+    """Set the EMIT bake profile on scene.cycles, returns the previous values."""
+    previous = {}
+    for key, value in EMIT_BAKE_PROFILE:
+        if hasattr(scene.cycles, key):
+            previous[key] = getattr(scene.cycles, key)
+            setattr(scene.cycles, key, value)
+    return previous
+
+def restore_bake_profile(scene, previous):
+    for key, value in previous.items():
+        setattr(scene.cycles, key, value)
+
+@contextlib.contextmanager
+def emit_bake_profile(scene, enabled=True):
+    previous = apply_bake_profile(scene) if enabled else {}
+    try:
+        yield
+    finally:
+        restore_bake_profile(scene, previous)
+
+def material_face_shares(obj, mats):
+    # Fraction of the object's faces using each material, to split a bake's time
+    mesh = obj.data
+    mat_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", mat_index)
+    counts = np.bincount(mat_index, minlength=len(obj.material_slots)) if len(mat_index) else np.zeros(len(obj.material_slots))
+    faces = {mat.name: 0 for mat in mats}
+    for i, slot in enumerate(obj.material_slots):
+        if slot.material is not None and slot.material.name in faces and i < len(counts):
+            faces[slot.material.name] += int(counts[i])
+    total = sum(faces.values()) or 1
+    return {name: n / total for name, n in faces.items()}
+
+def bake_cost_report(results, top=10):
+    """Lines with the bake time per pass and the most expensive materials."""
+    per_pass = {}
+    per_material = {}
+    for r in results:
+        per_pass[r["pass"]] = per_pass.get(r["pass"], 0.0) + r.get("seconds", 0.0)
+        for name, seconds in r.get("materials", {}).items():
+            per_material[name] = per_material.get(name, 0.0) + seconds
+    lines = [f"{mode}: {seconds:.2f}s" for mode, seconds in per_pass.items()]
+    ranked = sorted(per_material.items(), key=lambda item: item[1], reverse=True)[:top]
+    lines += [f"  {name}: {seconds:.2f}s" for name, seconds in ranked]
+    return lines
+
+
+# ------------------ Bake queue ------------------
+
+def sm2_materials(obj):
+    mats = []
+    for slot in obj.material_slots:
+        mat = slot.material
+        if mat is None or mat in mats:
+            continue
+        found = sm2_nodes(mat)
+        if found and found["output"] and found["group"]:
+            mats.append(mat)
+    return mats
+
+def clean_name(name):
+    base, _, digits = name.rpartition(".")
+    return base if base and digits.isdigit() else name
+
+def new_target_image(file_name, role, width, height, is_float):
+    image = bpy.data.images.new(file_name + TARGET_IMAGE_SUFFIX, width, height, alpha=True, float_buffer=is_float)
+    image.colorspace_settings.name = BAKE_TARGET_FORMATS[role][1]
+    image[TARGET_IMAGE_KEY] = True
+    image[TARGET_FILE_KEY] = file_name
+    return image
+
+def is_target_image(image):
+    return image is not None and bool(image.get(TARGET_IMAGE_KEY))
+
+def target_file_name(image):
+    # Output file name without extension, e.g. "Mat_a" for the image "Mat_a_bake";
+    # atlases and targets from older files are saved under their own name
+    return image.get(TARGET_FILE_KEY) or image.name
+
+def target_node(mat, suffix):
+    return mat.node_tree.nodes.get(TARGET_PREFIX + suffix)
+
+def bake_target(mat, role, suffix, size, allocation=None):
+    """Unlinked texture node the pass bakes into, created with its image when missing.
+
+    The textures feeding the SM2 group are never touched. allocation is
+    (width, height, is_float) from allocate_bake_targets; only images the
+    queue generated itself are regenerated to match it.
+    """
+    node = target_node(mat, suffix)
+    if node is None:
+        group = sm2_nodes(mat)["group"]
+        node = mat.node_tree.nodes.new('ShaderNodeTexImage')
+        node.name = node.label = TARGET_PREFIX + suffix
+        node.location = (group.location.x - 700, group.location.y - (300 if role == 'spec' else 0))
+    width, height, is_float = allocation or (size, size, BAKE_TARGET_FORMATS[role][0])
+    if not is_target_image(node.image):
+        file_name = f"{clean_name(mat.name)}{suffix}"
+        image = bpy.data.images.get(file_name + TARGET_IMAGE_SUFFIX)
+        node.image = image if is_target_image(image) else new_target_image(file_name, role, width, height, is_float)
+    image = node.image
+    if allocation is not None and (tuple(image.size) != (width, height) or image.is_float != is_float):
+        image.source = 'GENERATED'
+        image.generated_width, image.generated_height = width, height
+        image.use_generated_float = is_float
+    return node
+
+def material_areas(obj):
+    """World surface area and UV area per material of a mesh object."""
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    count = len(mesh.loop_triangles)
+    verts = np.empty(count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", verts)
+    loops = np.empty(count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", loops)
+    mat_index = np.empty(count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("material_index", mat_index)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    matrix = np.array(obj.matrix_world, dtype=np.float32)
+    co = co.reshape(-1, 3) @ matrix[:3, :3].T
+    tri = co[verts].reshape(-1, 3, 3)
+    world = 0.5 * np.linalg.norm(np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1)
+
+    uv_layer = mesh.uv_layers.active
+    uv_area = np.zeros(count, dtype=np.float32)
+    if uv_layer is not None:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uv)
+        t = uv.reshape(-1, 2)[loops].reshape(-1, 3, 2)
+        e1, e2 = t[:, 1] - t[:, 0], t[:, 2] - t[:, 0]
+        uv_area = 0.5 * np.abs(e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0])
+
+    slots = len(obj.material_slots)
+    world_sum = np.bincount(mat_index, weights=world, minlength=slots)
+    uv_sum = np.bincount(mat_index, weights=uv_area, minlength=slots)
+    areas = {}
+    for i, slot in enumerate(obj.material_slots):
+        if slot.material is not None and i < len(world_sum):
+            w, u = areas.get(slot.material.name, (0.0, 0.0))
+            areas[slot.material.name] = (w + float(world_sum[i]), u + float(uv_sum[i]))
+    return areas
+
+def target_bytes(width, height, is_float):
+    return width * height * 4 * (4 if is_float else 1)
+
+def allocate_bake_targets(objects, max_size, texel_density, memory_limit=0):
+    """Size and depth of every target image: {(material name, role): (width, height, is_float)}.
+
+    The side is the power of two giving texel_density pixels per metre over
+    the material's surface, capped at max_size. With a memory_limit in bytes
+    the largest images are halved until the total fits.
+    """
+    areas = {}
+    for obj in objects:
+        for name, (world, uv) in material_areas(obj).items():
+            w, u = areas.get(name, (0.0, 0.0))
+            areas[name] = (w + world, u + uv)
+
+    plan = {}
+    for name, (world, uv) in areas.items():
+        if name not in bpy.data.materials or not sm2_nodes(bpy.data.materials[name]):
+            continue
+        # uv of the texture covers `world` square metres -> whole texture side in pixels
+        side = math.sqrt(world / uv) * texel_density if uv > 1e-9 and world > 0 else MIN_BAKE_SIZE
+        side = min(max_size, max(MIN_BAKE_SIZE, 1 << math.ceil(math.log2(max(side, 1.0)))))
+        for _mode, role, _suffix in BAKE_PASSES:
+            plan[(name, role)] = (side, side, BAKE_TARGET_FORMATS[role][0])
+
+    while memory_limit and plan and sum(target_bytes(*v) for v in plan.values()) > memory_limit:
+        key = max(plan, key=lambda k: plan[k][0] * plan[k][1])
+        width, height, is_float = plan[key]
+        if width <= MIN_BAKE_SIZE:
+            break
+        plan[key] = (width // 2, height // 2, is_float)
+    return plan
+
+
+def select_only(context, obj):
+    view_layer = context.view_layer
+    for other in view_layer.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    view_layer.objects.active = obj
+
+def save_baked_images(images, output_dir):
+    folder = bpy.path.abspath(output_dir)
+    os.makedirs(folder, exist_ok=True)
+    saved = []
+    for image in images:
+        path = os.path.join(folder, f"{target_file_name(image)}.png")
+        image.filepath_raw = path
+        image.file_format = 'PNG'
+        image.save()
+        saved.append(path)
+    return saved
+
+# ------------------ Bake cache ------------------
+
+def _hash_value(h, value):
+    try:
+        value = tuple(value)
+    except TypeError:
+        pass
+    h.update(repr(value).encode())
+
+def image_pixels_digest(h, image):
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    h.update(pixels.tobytes())
+
+def image_digest(h, image, targets):
+    h.update(image.name.encode())
+    if image.name in targets:
+        _hash_value(h, (tuple(image.size), image.is_float))
+        return  # unlinked bake output, its pixels don't feed the bake
+    if image.is_dirty:
+        image_pixels_digest(h, image)  # painted in Blender and not saved yet
+    elif image.packed_file is not None:
+        h.update(hashlib.sha1(image.packed_file.data).digest())
+    elif image.source == 'FILE':
+        path = bpy.path.abspath(image.filepath, library=image.library)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            _hash_value(h, (stat.st_size, stat.st_mtime_ns))
+    else:
+        _hash_value(h, (image.source, image.generated_type, tuple(image.size), tuple(image.generated_color)))
+    _hash_value(h, image.colorspace_settings.name)
+
+def node_tree_digest(h, tree, targets, seen):
+    """Topology and values of a node tree and the groups/images it uses."""
+    if tree.name in seen:
+        return
+    seen.add(tree.name)
+    output = next((n for n in tree.nodes if isinstance(n, bpy.types.ShaderNodeOutputMaterial)), None)
+    for node in sorted(tree.nodes, key=lambda n: n.name):
+        if node.name.startswith(SWITCH_PREFIX):
+            continue
+        h.update(node.bl_idname.encode())
+        h.update(node.name.encode())
+        for prop in node.bl_rna.properties:
+            key = prop.identifier
+            if key in HASH_SKIP_PROPS or key.startswith('bl_') or prop.is_readonly:
+                continue
+            value = getattr(node, key)
+            if isinstance(value, bpy.types.Image):
+                # A target linked into the tree feeds the bake like any other texture
+                feeds = any(out.is_linked for out in node.outputs)
+                image_digest(h, value, () if feeds else targets)
+            elif isinstance(value, bpy.types.NodeTree):
+                node_tree_digest(h, value, targets, seen)
+            elif prop.type != 'POINTER' and prop.type != 'COLLECTION':
+                _hash_value(h, (key, value))
+        if node.type == 'VALTORGB':
+            for el in node.color_ramp.elements:
+                _hash_value(h, (el.position, tuple(el.color)))
+        for sock in node.inputs:
+            if not sock.is_linked and hasattr(sock, "default_value"):
+                _hash_value(h, (sock.identifier, sock.default_value))
+    for link in sorted(tree.links, key=lambda l: (l.to_node.name, l.to_socket.identifier)):
+        if link.to_node == output or link.from_node.name.startswith(SWITCH_PREFIX):
+            continue  # the Surface link and the mode switch follow the bake pass
+        _hash_value(h, (link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier, link.is_muted))
+
+def mesh_digest(obj, depsgraph):
+    """Digest of the evaluated mesh Cycles bakes: modifiers, shape keys and
+    custom normals included, not just the base mesh."""
+    h = hashlib.sha1()
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        _feed_mesh(h, mesh)
+    finally:
+        evaluated.to_mesh_clear()
+    h.update(obj.name.encode())
+    return h.digest()
+
+def _feed_mesh(h, mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    corners = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corners)
+    starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    mat_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", mat_index)
+    for buffer in (co, corners, starts, mat_index):
+        h.update(buffer.tobytes())
+    uv_layer = mesh.uv_layers.active
+    if uv_layer is not None:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uv)
+        h.update(uv.tobytes())
+    normals = np.empty(len(mesh.corner_normals) * 3, dtype=np.float32)
+    mesh.corner_normals.foreach_get("vector", normals)
+    h.update(normals.tobytes())
+
+def bake_settings_digest(h, scene, mode, size):
+    bake = scene.render.bake
+    _hash_value(h, (mode, size, bake.margin, bake.margin_type, bake.target, scene.cycles.samples))
+
+def bake_hashes(scene, objects, mode, size, mesh_digests):
+    """Hash per material for one pass, over everything that feeds its bake.
+
+    mesh_digests is {object name: mesh_digest()}, the same for every pass.
+    """
+    users = {}
+    for obj in objects:
+        for mat in sm2_materials(obj):
+            users.setdefault(mat.name, []).append(obj)
+    targets = set()
+    for mat_name in users:
+        mat = bpy.data.materials[mat_name]
+        targets.update(node.image.name for node in (target_node(mat, suffix) for _mode, _role, suffix in BAKE_PASSES)
+                       if node is not None and is_target_image(node.image))
+    hashes = {}
+    for mat_name, objs in users.items():
+        h = hashlib.sha1()
+        node_tree_digest(h, bpy.data.materials[mat_name].node_tree, targets, set())
+        for obj in sorted(objs, key=lambda o: o.name):
+            h.update(mesh_digests[obj.name])
+        bake_settings_digest(h, scene, mode, size)
+        hashes[mat_name] = h.hexdigest()
+    return hashes
+
+def load_bake_manifest(output_dir):
+    path = os.path.join(bpy.path.abspath(output_dir), BAKE_MANIFEST)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("images", {})
+    except (OSError, ValueError):
+        return {}
+
+def update_bake_manifest(output_dir, results):
+    """Record the hashes of successful bakes next to the images."""
+    images = load_bake_manifest(output_dir)
+    # An image shared with a failed bake is incomplete, leave it out
+    failed = {name for r in results if r["error"] for name in r.get("hashes", {})}
+    for result in results:
+        for name, entry in result.get("hashes", {}).items():
+            if name in failed:
+                images.pop(name, None)
+            else:
+                images[name] = entry
+    path = os.path.join(bpy.path.abspath(output_dir), BAKE_MANIFEST)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "images": images}, f, indent=1, sort_keys=True)
+
+def cached_image(manifest, output_dir, image, digest):
+    name = target_file_name(image)
+    path = os.path.join(bpy.path.abspath(output_dir), f"{name}.png")
+    entry = manifest.get(name)
+    return path if entry and entry["hash"] == digest and os.path.isfile(path) else None
+
+def use_cached_image(image, path):
+    image.filepath = path
+    image.source = 'FILE'
+    image.reload()
+
+
+def run_bake_queue(context, objects, output_dir, size=2048, use_cache=True, write_manifest=True, fast_profile=True,
+                   texel_density=0.0, memory_limit=0):
+    """Bake _a/Base Color and _spec of every SM2 material on the objects.
+
+    Each pass bakes into its own target image (see bake_target), the textures
+    feeding the group are only read. With a texel_density (pixels per metre) the target images are sized and
+    allocated by allocate_bake_targets, size being the largest side; without,
+    new images are size x size and existing ones are kept.
+
+    With use_cache, an object's pass is skipped when every image it bakes into
+    is already in the output folder with a matching hash. fast_profile bakes
+    with EMIT_BAKE_PROFILE and puts the scene settings back afterwards.
+    Returns (results, saved paths); each result is
+    {"object", "pass", "error", "skipped", "hashes", "seconds", "materials"}
+    where "materials" splits the bake time by face count.
+    """
+    start = time.perf_counter()
+    scene = context.scene
+    scene.render.engine = 'CYCLES'
+    if bpy.app.background:
+        scene.cycles.device = 'CPU'
+    scene.cycles.bake_type = 'EMIT'
+    scene.render.bake.use_clear = False
+
+    # Targets first, so the node trees hash the same on every run
+    objects = [o for o in objects if sm2_materials(o)]
+    plan = allocate_bake_targets(objects, size, texel_density, memory_limit) if texel_density > 0 else {}
+    targets = {}
+    for obj in objects:
+        for mat in sm2_materials(obj):
+            for _mode, role, suffix in BAKE_PASSES:
+                if (mat.name, role) not in targets:
+                    targets[(mat.name, role)] = bake_target(mat, role, suffix, size, plan.get((mat.name, role)))
+    buffer_bytes = sum(image_bytes(image) for image in {node.image for node in targets.values()})
+    print(f"[SM2 Bake] {len(targets)} target image(s), {buffer_bytes / (1024 * 1024):.1f} MB of bake buffers")
+    manifest = load_bake_manifest(output_dir) if use_cache else {}
+    depsgraph = context.evaluated_depsgraph_get()
+    mesh_digests = {obj.name: mesh_digest(obj, depsgraph) for obj in objects}
+    setup_seconds = time.perf_counter() - start
+
+    selected = [o for o in context.view_layer.objects if o.select_get()]
+    active = context.view_layer.objects.active
+    results = []
+    images = []
+    with emit_bake_profile(scene, fast_profile):
+        try:
+            for mode, role, suffix in BAKE_PASSES:
+                apply_bake_mode(scene, mode)
+                hashes = bake_hashes(scene, objects, mode, size, mesh_digests)
+                for obj in objects:
+                    mats = sm2_materials(obj)
+                    nodes = [targets[(mat.name, role)] for mat in mats]
+                    files = [target_file_name(n.image) for n in nodes]
+                    result = {"object": obj.name, "pass": mode, "error": None, "skipped": False, "seconds": 0.0, "materials": {},
+                              "hashes": {f: {"hash": hashes[m.name], "file": f"{f}.png"} for m, f in zip(mats, files)}}
+                    results.append(result)
+
+                    cached = [cached_image(manifest, output_dir, n.image, hashes[m.name]) for m, n in zip(mats, nodes)]
+                    if use_cache and all(cached):
+                        for node, path in zip(nodes, cached):
+                            if node.image not in images and node.image.filepath != path:
+                                use_cached_image(node.image, path)
+                        result["skipped"] = True
+                        continue
+
+                    for mat, node in zip(mats, nodes):
+                        node.select = True
+                        mat.node_tree.nodes.active = node
+                        if node.image not in images:
+                            images.append(node.image)
+                    select_only(context, obj)
+                    bake_start = time.perf_counter()
+                    try:
+                        bpy.ops.object.bake(type='EMIT', use_clear=False)
+                    except RuntimeError as e:
+                        result["error"] = str(e).strip()
+                    result["seconds"] = time.perf_counter() - bake_start
+                    shares = material_face_shares(obj, mats)
+                    result["materials"] = {name: result["seconds"] * share for name, share in shares.items()}
+        finally:
+            apply_bake_mode(scene, 'BSDF')
+            for obj in context.view_layer.objects:
+                obj.select_set(obj in selected)
+            context.view_layer.objects.active = active
+
+    save_start = time.perf_counter()
+    saved = save_baked_images(images, output_dir)
+    if write_manifest:
+        update_bake_manifest(output_dir, results)
+    bake_seconds = sum(r["seconds"] for r in results)
+    print(f"[SM2 Bake] setup {setup_seconds:.2f}s, baking {bake_seconds:.2f}s, "
+          f"saving {time.perf_counter() - save_start:.2f}s, total {time.perf_counter() - start:.2f}s")
+    return results, saved
+
+
+# ------------------ Atlas merge ------------------
+
+# Every material becomes a power-of-two square tile of the atlas, its UVs are
+# moved into the tile and its maps are resampled into it. Tiling materials (UVs outside 0-1)
+# can't share an atlas and are left alone.
+
+def _settings_value(value):
+    try:
+        return tuple(round(v, 5) for v in value)
+    except TypeError:
+        return round(value, 5) if isinstance(value, float) else value
+
+def material_settings(group_node):
+    # Unlinked group inputs, only materials that agree on them can merge
+    return tuple((s.identifier, _settings_value(s.default_value))
+                 for s in group_node.inputs if not s.is_linked and hasattr(s, "default_value"))
+
+def input_image(group_node, input_name):
+    sock = group_node.inputs.get(input_name)
+    if sock is None or not sock.is_linked:
+        return None
+    node = sock.links[0].from_node
+    return node.image if node.type == 'TEX_IMAGE' else None
+
+def input_fill(group_node, input_name):
+    # Pixel value for a material that has no texture on this input
+    if input_name == '_n':
+        return FLAT_NORMAL
+    sock = group_node.inputs.get(input_name)
+    value = getattr(sock, "default_value", 0.0) if sock is not None else 0.0
+    try:
+        value = tuple(value)
+    except TypeError:
+        return (value, value, value, 1.0)
+    return (value + (1.0,) * 4)[:4]
+
+def corner_arrays(mesh):
+    # Slot index and UV of every face corner
+    count = len(mesh.polygons)
+    mat_index = np.empty(count, dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", mat_index)
+    loop_total = np.empty(count, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+    mesh.uv_layers.active.data.foreach_get("uv", uv)
+    return np.repeat(mat_index, loop_total), uv.reshape(-1, 2)
+
+def image_bytes(image):
+    width, height = image.size
+    return width * height * image.channels * (4 if image.is_float else 1)
+
+def draw_call_count(objects):
+    total = 0
+    for obj in objects:
+        mesh = obj.data
+        mat_index = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", mat_index)
+        used = {mesh.materials[i] for i in np.unique(mat_index) if i < len(mesh.materials)}
+        total += len(used)
+    return total
+
+def atlas_groups(meshes):
+    """SM2 materials that can share an atlas, grouped by their group settings.
+
+    Returns (groups, skipped) where skipped maps material names to a reason.
+    """
+    bounds = {}
+    for mesh in meshes:
+        corner_mat, uv = corner_arrays(mesh)
+        for slot, mat in enumerate(mesh.materials):
+            if mat is None:
                 continue
+            sel = corner_mat == slot
+            if not sel.any():
+                continue
+            lo, hi = uv[sel].min(axis=0), uv[sel].max(axis=0)
+            if mat.name in bounds:
+                lo, hi = np.minimum(lo, bounds[mat.name][0]), np.maximum(hi, bounds[mat.name][1])
+            bounds[mat.name] = (lo, hi)
+
+    groups, skipped = {}, {}
+    for name, (lo, hi) in bounds.items():
+        mat = bpy.data.materials[name]
+        found = sm2_nodes(mat)
+        if not found or not found["group"]:
+            skipped[name] = "not an SM2 material"
+        elif lo.min() < -1e-3 or hi.max() > 1.0 + 1e-3:
+            skipped[name] = "UVs outside 0-1 (tiling)"
+        else:
+            groups.setdefault(material_settings(found["group"]), []).append(mat)
+    for mats in groups.values():
+        if len(mats) < 2:
+            skipped[mats[0].name] = "no other material with the same settings"
+    return [sorted(mats, key=lambda mat: mat.name) for mats in groups.values() if len(mats) > 1], skipped
+
+def pack_tiles(sizes, max_size):
+    """Place power-of-two square tiles without gaps. Returns ({name: (x, y, size)}, width, height).
+
+    Largest first, each tile takes the smallest free square that fits and the
+    rest of that square is split into quadrants, so nothing is wasted.
+    """
+    order = sorted(sizes.items(), key=lambda item: (-item[1], item[0]))
+    width = order[0][1]
+    free = [(0, 0, width)]
+    rects = {}
+    for name, t in order:
+        fits = [sq for sq in free if sq[2] >= t]
+        if not fits:
+            # Double the atlas, the new area is three free squares
+            free += [(width, 0, width), (0, width, width), (width, width, width)]
+            width *= 2
+            fits = [sq for sq in free if sq[2] >= t]
+        x, y, size = min(fits, key=lambda sq: (sq[2], sq[1], sq[0]))
+        free.remove((x, y, size))
+        while size > t:
+            size //= 2
+            free += [(x + size, y, size), (x, y + size, size), (x + size, y + size, size)]
+        rects[name] = (x, y, t)
+    width = max(x + t for x, _y, t in rects.values())
+    height = max(y + t for _x, y, t in rects.values())
+    width, height = (1 << math.ceil(math.log2(v)) for v in (width, height))
+    # Tiles and atlas are powers of two, so shrinking by a power of two stays exact
+    shrink = max(1, max(width, height) // max_size)
+    rects = {name: (x // shrink, y // shrink, t // shrink) for name, (x, y, t) in rects.items()}
+    return rects, width // shrink, height // shrink
+
+def build_atlas_image(name, rects, width, height, sources, fills, padding, non_color):
+    pixels = np.zeros((height, width, 4), dtype=np.float32)
+    for mat_name, (x, y, t) in rects.items():
+        pad = min(padding, (t - 1) // 2)
+        inner = t - 2 * pad
+        src = sources.get(mat_name)
+        if src is None or src.size[0] == 0:
+            pixels[y:y + t, x:x + t] = fills[mat_name]
+            continue
+        tmp = src.copy()
+        tmp.scale(inner, inner)
+        tile = np.empty(inner * inner * 4, dtype=np.float32)
+        tmp.pixels.foreach_get(tile)
+        bpy.data.images.remove(tmp)
+        # Edge pixels repeated into the padding so mips don't bleed between tiles
+        pixels[y:y + t, x:x + t] = np.pad(tile.reshape(inner, inner, 4), ((pad, pad), (pad, pad), (0, 0)), mode='edge')
+    image = bpy.data.images.get(name) or bpy.data.images.new(name, width, height, alpha=True)
+    if tuple(image.size) != (width, height):
+        image.scale(width, height)
+    if non_color:
+        image.colorspace_settings.name = 'Non-Color'
+    image.pixels.foreach_set(pixels.ravel())
+    image.update()
+    return image
+
+def atlas_material(mats, images):
+    # Copy of the first material with its SM2 inputs fed by the atlas images
+    atlas = mats[0].copy()
+    atlas.name = f"{clean_name(mats[0].name)}_atlas"
+    found = sm2_nodes(atlas)
+    group = found["group"]
+    tree = atlas.node_tree
+    for n, (input_name, _suffix) in enumerate(ATLAS_MAPS):
+        sock = group.inputs.get(input_name)
+        if sock is None or input_name not in images:
+            continue
+        if sock.is_linked and sock.links[0].from_node.type == 'TEX_IMAGE':
+            tex = sock.links[0].from_node
+        else:
+            tex = tree.nodes.new('ShaderNodeTexImage')
+            tex.location = (group.location.x - 400, group.location.y - 200 * n)
+            tree.links.new(tex.outputs['Color'], sock)
+        tex.image = images[input_name]
+    return atlas
+
+def remap_atlas_uvs(mesh, slots, rects, width, height, padding):
+    corner_mat, uv = corner_arrays(mesh)
+    for slot, mat_name in slots.items():
+        x, y, t = rects[mat_name]
+        pad = min(padding, (t - 1) // 2)
+        sel = corner_mat == slot
+        uv[sel] = (np.array([x + pad, y + pad]) + uv[sel] * (t - 2 * pad)) / np.array([width, height])
+    mesh.uv_layers.active.data.foreach_set("uv", uv.ravel())
+    mesh.update()
+
+def collapse_material_slots(mesh):
+    # Drop repeated slots, same as the SM2 Full Clean material merge does per object
+    mats = list(mesh.materials)
+    unique = []
+    remap = []
+    for mat in mats:
+        if mat not in unique:
+            unique.append(mat)
+        remap.append(unique.index(mat))
+    if len(unique) == len(mats):
+        return
+    mat_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", mat_index)
+    mat_index = np.array(remap, dtype=np.int32)[np.clip(mat_index, 0, len(remap) - 1)]
+    mesh.materials.clear()
+    for mat in unique:
+        mesh.materials.append(mat)
+    mesh.polygons.foreach_set("material_index", mat_index)
+    mesh.update()
+
+def merge_into_atlases(objects, output_dir, max_size=4096, padding=4, clean_materials=True):
+    """Merge the SM2 materials of the objects into atlas materials.
+
+    With clean_materials, the merged materials that nothing uses any more are
+    removed; the rest of the file is left alone. Returns a report dict with the atlases, skipped materials, and draw calls
+    and texture bytes before and after.
+    """
+    objects = [o for o in objects if o.type == 'MESH' and o.data.uv_layers.active is not None]
+    meshes = list({o.data for o in objects})
+    groups, skipped = atlas_groups(meshes)
+    report = {"atlases": [], "skipped": skipped, "draw_calls": (draw_call_count(objects), 0),
+              "memory": (0, 0), "saved": []}
+    memory_before = memory_after = 0
+    new_images = []
+    replaced = []
+
+    for mats in groups:
+        group_nodes = {mat.name: sm2_nodes(mat)["group"] for mat in mats}
+        sources = {input_name: {m.name: input_image(group_nodes[m.name], input_name) for m in mats}
+                   for input_name, _suffix in ATLAS_MAPS}
+        seen = set()
+        for images in sources.values():
+            for image in images.values():
+                if image is not None and image.name not in seen:
+                    seen.add(image.name)
+                    memory_before += image_bytes(image)
+
+        sizes = {}
+        for mat in mats:
+            dims = [max(img.size) for maps in sources.values() for img in [maps[mat.name]] if img is not None]
+            size = max(dims) if dims and max(dims) > 0 else 256
+            sizes[mat.name] = max(64, 1 << math.ceil(math.log2(size)))
+        rects, width, height = pack_tiles(sizes, max_size)
+
+        base = clean_name(mats[0].name)
+        images = {}
+        for input_name, suffix in ATLAS_MAPS:
+            if not any(sources[input_name].values()):
+                continue
+            fills = {m.name: input_fill(group_nodes[m.name], input_name) for m in mats}
+            image = build_atlas_image(f"{base}_atlas{suffix}", rects, width, height,
+                                      sources[input_name], fills, padding, input_name != 'base color / _a')
+            images[input_name] = image
+            new_images.append(image)
+            memory_after += image_bytes(image)
+
+        atlas = atlas_material(mats, images)
+        replaced.extend(mats)
+        names = {m.name for m in mats}
+        for mesh in meshes:
+            slots = {i: m.name for i, m in enumerate(mesh.materials) if m is not None and m.name in names}
+            if not slots:
+                continue
+            remap_atlas_uvs(mesh, slots, rects, width, height, padding)
+            for i in slots:
+                mesh.materials[i] = atlas
+        report["atlases"].append({"material": atlas.name, "merged": sorted(names), "size": (width, height)})
+
+    for mesh in meshes:
+        collapse_material_slots(mesh)
+    if clean_materials:
+        for mat in replaced:
+            if mat.users == 0:
+                bpy.data.materials.remove(mat)
+    report["saved"] = save_baked_images(new_images, output_dir) if new_images else []
+    report["draw_calls"] = (report["draw_calls"][0], draw_call_count(objects))
+    report["memory"] = (memory_before, memory_after)
+    return report
 
-            tree = mat.node_tree
-            nodes = tree.nodes
-            links = tree.links
 
-            output_node = next((n for n in nodes if isinstance(n, bpy.types.ShaderNodeOutputMaterial)), None)
-            group_node = next((n for n in nodes if n.type == 'GROUP' and n.node_tree and n.node_tree.name.startswith(group_name_prefix)), None)
+# ------------------ Parallel bake ------------------
 
-            if output_node and group_node:
-                # Remove Surface links to output
-                for link in list(links):
-                    if link.to_node == output_node and link.to_socket.name == 'Surface':
-                        links.remove(link)
-                if '_a/Base Color bake' in group_node.outputs:
-                    links.new(group_node.outputs['_a/Base Color bake'], output_node.inputs['Surface'])
+def bake_partitions(objects, worker_count):
+    """Split objects into balanced groups for the bake workers.
 
+    Objects sharing an SM2 material stay in the same group, so every baked
+    image is written by exactly one worker. Groups are balanced by face count.
+    """
+    parent = {obj.name: obj.name for obj in objects}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    owner = {}
+    for obj in objects:
+        for mat in sm2_materials(obj):
+            if mat.name in owner:
+                parent[find(obj.name)] = find(owner[mat.name])
+            else:
+                owner[mat.name] = obj.name
+
+    clusters = {}
+    for obj in objects:
+        clusters.setdefault(find(obj.name), []).append(obj)
+    cost = lambda cluster: sum(len(o.data.polygons) for o in cluster)
+
+    bins = [[] for _ in range(min(worker_count, len(clusters)))]
+    loads = [0] * len(bins)
+    for cluster in sorted(clusters.values(), key=cost, reverse=True):
+        i = loads.index(min(loads))
+        bins[i].extend(o.name for o in cluster)
+        loads[i] += cost(cluster)
+    return [b for b in bins if b]
+
+def _run_bake_workers(work_dir, parts, output_dir, size, use_cache, fast_profile, texel_density, memory_limit):
+    # Start one background Blender per partition in work_dir and collect their summaries
+    blend = os.path.join(work_dir, "bake_source.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=blend, copy=True)
+    output = bpy.path.abspath(output_dir)
+    threads = max(1, (os.cpu_count() or 1) // len(parts))
+
+    procs = []
+    summaries = []
+    try:
+        for n, names in enumerate(parts):
+            job = os.path.join(work_dir, f"job_{n}.json")
+            with open(job, "w", encoding="utf-8") as f:
+                json.dump({"objects": names, "result": os.path.join(work_dir, f"result_{n}.json")}, f)
+            cmd = [
+                bpy.app.binary_path, "-b", "--factory-startup", blend, "-t", str(threads),
+                "--python", os.path.abspath(__file__),
+                "--", "--sm2-bake-queue", "--output", output, "--size", str(size), "--job", job,
+            ]
+            if not use_cache:
+                cmd.append("--no-cache")
+            if not fast_profile:
+                cmd.append("--keep-settings")
+            if texel_density > 0:
+                # Each worker gets an even share of the memory budget
+                share = max(1, memory_limit // len(parts) // (1024 * 1024)) if memory_limit > 0 else 0
+                cmd += ["--texel-density", str(texel_density), "--memory-limit", str(share)]
+            procs.append((n, names, job, time.perf_counter(),
+                          subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)))
+
+        for n, names, job, start, proc in procs:
+            # Workers run side by side, so the timeout counts from each one's start
+            timed_out = False
+            try:
+                _out, err = proc.communicate(timeout=max(1, start + WORKER_TIMEOUT - time.perf_counter()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                _out, err = proc.communicate()
+                timed_out = True
+            seconds = time.perf_counter() - start
+            summary = {"worker": n, "objects": len(names), "bakes": 0, "skipped": 0, "failed": 0,
+                       "seconds": seconds, "saved": [], "results": [], "error": None}
+            result_path = os.path.join(work_dir, f"result_{n}.json")
+            if os.path.isfile(result_path):
+                with open(result_path, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+                summary["results"] = result["results"]
+                summary["bakes"] = sum(1 for r in result["results"] if not r["error"] and not r["skipped"])
+                summary["skipped"] = sum(1 for r in result["results"] if r["skipped"])
+                summary["failed"] = sum(1 for r in result["results"] if r["error"])
+                summary["saved"] = result["saved"]
+            else:
+                summary["error"] = f"exited with {proc.returncode}: {err.strip()[-200:]}"
+            if timed_out:
+                summary["error"] = f"timed out after {WORKER_TIMEOUT} s"
+            summaries.append(summary)
+    finally:
+        # Don't leave workers running on a failure, work_dir is removed next
+        for *_info, proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+    return summaries
+
+def run_parallel_bake(context, objects, output_dir, size=2048, worker_count=0, use_cache=True, fast_profile=True,
+                      texel_density=0.0, memory_limit=0):
+    """Bake objects with several background Blender workers.
+
+    The current file is saved as a temporary copy that each worker opens and
+    runs the bake queue on. Workers still running after WORKER_TIMEOUT are
+    stopped and reported in their summary's error. Returns one summary per worker.
+    """
+    worker_count = worker_count or max(1, (os.cpu_count() or 2) // 2)
+    parts = bake_partitions([o for o in objects if sm2_materials(o)], worker_count)
+    if not parts:
+        return []
+
+    work_dir = tempfile.mkdtemp(prefix="sm2_bake_")
+    try:
+        summaries = _run_bake_workers(work_dir, parts, output_dir, size, use_cache, fast_profile,
+                                      texel_density, memory_limit)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = bpy.path.abspath(output_dir)
+    update_bake_manifest(output, [r for s in summaries for r in s["results"]])
+    collect_baked_images([p for s in summaries for p in s["saved"]])
+    for line in bake_cost_report([r for s in summaries for r in s["results"]]):
+        print(f"[SM2 Bake] {line}")
+    return summaries
+
+def collect_baked_images(paths):
+    # Point the target images of this file at the worker output and reload them
+    by_file = {target_file_name(image): image for image in bpy.data.images if is_target_image(image)}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        image = by_file.get(name)
+        if image is None:
+            image = bpy.data.images.load(path, check_existing=True)
+            image.name = name + TARGET_IMAGE_SUFFIX
+            image[TARGET_IMAGE_KEY] = True
+            image[TARGET_FILE_KEY] = name
+        else:
+            image.filepath = path
+            image.reload()
+
+def print_worker_summaries(summaries):
+    for s in summaries:
+        if s["error"]:
+            print(f"[SM2 Bake] worker {s['worker']} FAILED: {s['error']}")
+            continue
+        rate = s["bakes"] / s["seconds"] if s["seconds"] else 0.0
+        print(f"[SM2 Bake] worker {s['worker']}: {s['objects']} object(s), {s['bakes']} bake(s), "
+              f"{s['skipped']} cached, {s['failed']} failed in {s['seconds']:.1f}s ({rate:.2f} bakes/s)")
+
+
+class BAKE_OT_prepare(bpy.types.Operator):
+    bl_idname = "bake.prepare_shader"
+    bl_label = "Prepare SM2 Shader for Bake"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_fast_profile: bpy.props.BoolProperty(
+        name="Fast EMIT Profile",
+        default=True,
+        description="Bake with 1 sample, no denoising and no bounces; Restore Shader puts the settings back",
+    )
+
+    def execute(self, context):
         scene = context.scene
+        apply_bake_mode(scene, 'BASE', 'base')
+
         scene.render.engine = 'CYCLES'
         scene.cycles.bake_type = 'EMIT'
         scene.render.bake.use_clear = False
-
-        for mat in bpy.data.materials:
-            if mat.use_nodes:
-                for node in mat.node_tree.nodes:
-                    if node.type == 'TEX_IMAGE' and node.label.lower() in ['base color', 'basecolor']:
-                        node.select = True
-                        mat.node_tree.nodes.active = node
+        # Keep the first backup if Prepare is pressed twice
+        if self.use_fast_profile and BAKE_PROFILE_KEY not in scene:
+            scene[BAKE_PROFILE_KEY] = json.dumps(apply_bake_profile(scene))
 
         return {'FINISHED'}
 
@@ -56,59 +1186,159 @@ class BAKE_OT_restore(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        group_name_prefix = "SM2 Universal Shader"
-        for mat in bpy.data.materials:
-            if not mat.use_nodes:
-                continue
+        scene = context.scene
+        apply_bake_mode(scene, 'BSDF')
+        if BAKE_PROFILE_KEY in scene:
+            restore_bake_profile(scene, json.loads(scene[BAKE_PROFILE_KEY]))
+            del scene[BAKE_PROFILE_KEY]
+        return {'FINISHED'}
 
-            tree = mat.node_tree
-            nodes = tree.nodes
-            links = tree.links
 
-            output_node = next((n for n in nodes if isinstance(n, bpy.types.ShaderNodeOutputMaterial)), None)
-            group_node = next((n for n in nodes if n.type == 'GROUP' and n.node_tree and n.node_tree.name.startswith(group_name_prefix)), None)
+class BAKE_OT_connect_spec(bpy.types.Operator):
+    bl_idname = "bake.connect_spec_output"
+    bl_label = "Connect _spec Bake to Surface"
+    bl_options = {'REGISTER', 'UNDO'}
 
-            if output_node and group_node:
-                for link in list(links):
-                    if link.to_node == output_node and link.to_socket.name == 'Surface':
-                        links.remove(link)
-                if 'BSDF' in group_node.outputs:
-                    links.new(group_node.outputs['BSDF'], output_node.inputs['Surface'])
+    def execute(self, context):
+        apply_bake_mode(context.scene, 'SPEC', 'spec')
+        return {'FINISHED'}
 
+
+class BAKE_OT_bake_queue(bpy.types.Operator):
+    bl_idname = "bake.run_queue"
+    bl_label = "Bake All SM2 Materials"
+    bl_description = "Bake _a/Base Color and _spec of every SM2 material, save the images and restore the shader"
+    bl_options = {'REGISTER'}
+
+    output_dir: bpy.props.StringProperty(name="Output Folder", subtype='DIR_PATH', default="//baked/")
+    size: bpy.props.IntProperty(name="Image Size", default=2048, min=16, max=16384, description="Size of new images, or the largest side with Texel Density")
+    texel_density: bpy.props.FloatProperty(name="Texel Density", default=512.0, min=0.0, description="Pixels per metre used to size the target images, 0 = always Image Size")
+    memory_limit: bpy.props.IntProperty(name="Memory Limit (MB)", default=0, min=0, description="Shrink the largest targets until the bake buffers fit, 0 = no limit")
+    selected_only: bpy.props.BoolProperty(name="Selected Only", default=True)
+    use_cache: bpy.props.BoolProperty(name="Skip Unchanged", default=True, description="Skip bakes whose inputs match the manifest in the output folder")
+    use_fast_profile: bpy.props.BoolProperty(name="Fast EMIT Profile", default=True, description="Bake with 1 sample, no denoising and no bounces, then restore the settings")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        source = context.selected_objects if self.selected_only else context.view_layer.objects
+        objects = [o for o in source if o.type == 'MESH']
+        results, saved = run_bake_queue(context, objects, self.output_dir, self.size, self.use_cache, fast_profile=self.use_fast_profile,
+                                        texel_density=self.texel_density, memory_limit=self.memory_limit * 1024 * 1024)
+        for line in bake_cost_report(results):
+            print(f"[SM2 Bake] {line}")
+        failed = [r for r in results if r["error"]]
+        skipped = sum(1 for r in results if r["skipped"])
+        for r in failed:
+            print(f"[SM2 Bake] {r['object']} {r['pass']} failed: {r['error']}")
+        level = {'WARNING'} if failed else {'INFO'}
+        self.report(level, f"{len(results) - len(failed) - skipped} bake(s), {skipped} cached, {len(failed)} failed, {len(saved)} image(s) saved")
         return {'FINISHED'}
 
 
-class BAKE_OT_connect_spec(bpy.types.Operator):
-    bl_idname = "bake.connect_spec_output"
-    bl_label = "Connect _spec Bake to Surface"
+class BAKE_OT_bake_parallel(bpy.types.Operator):
+    bl_idname = "bake.run_parallel"
+    bl_label = "Bake SM2 Materials in Parallel"
+    bl_description = "Bake every SM2 material with several background Blender processes"
+    bl_options = {'REGISTER'}
+
+    output_dir: bpy.props.StringProperty(name="Output Folder", subtype='DIR_PATH', default="//baked/")
+    size: bpy.props.IntProperty(name="Image Size", default=2048, min=16, max=16384, description="Size of new images, or the largest side with Texel Density")
+    texel_density: bpy.props.FloatProperty(name="Texel Density", default=512.0, min=0.0, description="Pixels per metre used to size the target images, 0 = always Image Size")
+    memory_limit: bpy.props.IntProperty(name="Memory Limit (MB)", default=0, min=0, description="Shrink the largest targets until the bake buffers fit, 0 = no limit")
+    selected_only: bpy.props.BoolProperty(name="Selected Only", default=True)
+    use_cache: bpy.props.BoolProperty(name="Skip Unchanged", default=True, description="Skip bakes whose inputs match the manifest in the output folder")
+    use_fast_profile: bpy.props.BoolProperty(name="Fast EMIT Profile", default=True, description="Bake with 1 sample, no denoising and no bounces, then restore the settings")
+    worker_count: bpy.props.IntProperty(name="Workers", default=0, min=0, max=64, description="Background Blender processes, 0 = half the cores")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        if not bpy.data.is_saved and self.output_dir.startswith("//"):
+            self.report({'ERROR'}, "Save the file first or pick an absolute output folder")
+            return {'CANCELLED'}
+        source = context.selected_objects if self.selected_only else context.view_layer.objects
+        objects = [o for o in source if o.type == 'MESH']
+        summaries = run_parallel_bake(context, objects, self.output_dir, self.size, self.worker_count, self.use_cache,
+                                      self.use_fast_profile, self.texel_density, self.memory_limit * 1024 * 1024)
+        print_worker_summaries(summaries)
+        bakes = sum(s["bakes"] for s in summaries)
+        failed = sum(s["failed"] for s in summaries) + sum(1 for s in summaries if s["error"])
+        level = {'WARNING'} if failed else {'INFO'}
+        self.report(level, f"{len(summaries)} worker(s), {bakes} bake(s), {failed} failed (see console)")
+        return {'FINISHED'}
+
+
+class BAKE_OT_atlas_merge(bpy.types.Operator):
+    bl_idname = "bake.atlas_merge_materials"
+    bl_label = "Merge SM2 Materials into Atlas"
+    bl_description = "Pack the SM2 materials of the selected objects into atlas textures and one material per shared setting"
     bl_options = {'REGISTER', 'UNDO'}
 
+    output_dir: bpy.props.StringProperty(name="Output Folder", subtype='DIR_PATH', default="//atlas/")
+    max_size: bpy.props.EnumProperty(
+        name="Max Atlas Size",
+        items=[('1024', "1024", ""), ('2048', "2048", ""), ('4096', "4096", ""), ('8192', "8192", "")],
+        default='4096',
+    )
+    padding: bpy.props.IntProperty(name="Padding", default=4, min=0, max=64, description="Pixels of edge padding around every tile")
+    clean_materials: bpy.props.BoolProperty(
+        name="Clean Materials",
+        default=True,
+        description="Remove the merged materials once no object uses them, other materials in the file are left alone",
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
     def execute(self, context):
-        group_name_prefix = "SM2 Universal Shader"
-        for mat in bpy.data.materials:
-            if not mat.use_nodes:
-                continue
+        report = merge_into_atlases(context.selected_objects, self.output_dir, int(self.max_size), self.padding, self.clean_materials)
+        for name, reason in sorted(report["skipped"].items()):
+            print(f"[SM2 Atlas] Skipped {name}: {reason}")
+        for atlas in report["atlases"]:
+            print(f"[SM2 Atlas] {atlas['material']} {atlas['size'][0]}x{atlas['size'][1]}: {', '.join(atlas['merged'])}")
+        if not report["atlases"]:
+            self.report({'WARNING'}, "No materials could be merged (see console)")
+            return {'CANCELLED'}
+        before, after = report["draw_calls"]
+        mem_before, mem_after = (m / (1024 * 1024) for m in report["memory"])
+        self.report({'INFO'}, f"{len(report['atlases'])} atlas(es): draw calls {before} -> {after}, "
+                              f"textures {mem_before:.1f} MB -> {mem_after:.1f} MB")
+        return {'FINISHED'}
 
-            tree = mat.node_tree
-            nodes = tree.nodes
-            links = tree.links
 
-            output_node = next((n for n in nodes if isinstance(n, bpy.types.ShaderNodeOutputMaterial)), None)
-            group_node = next((n for n in nodes if n.type == 'GROUP' and n.node_tree and n.node_tree.name.startswith(group_name_prefix)), None)
+class BAKE_OT_install_switch(bpy.types.Operator):
+    bl_idname = "bake.install_mode_switch"
+    bl_label = "Install Bake Mode Switch"
+    bl_description = "Build a bake mode switch inside the SM2 Universal Shader group so modes change without relinking materials"
+    bl_options = {'REGISTER', 'UNDO'}
 
-            if output_node and group_node:
-                for link in list(links):
-                    if link.to_node == output_node and link.to_socket.name == 'Surface':
-                        links.remove(link)
-                if '_spec bake' in group_node.outputs:
-                    links.new(group_node.outputs['_spec bake'], output_node.inputs['Surface'])
+    def execute(self, context):
+        groups = sm2_groups()
+        if not groups:
+            self.report({'WARNING'}, "No SM2 Universal Shader group in this file")
+            return {'CANCELLED'}
+        for tree in groups:
+            error = install_bake_switch(tree)
+            if error:
+                self.report({'WARNING'}, f"{tree.name}: {error}")
+        # Materials feed Surface from BSDF, the switch decides what that carries
+        set_switch_mode(context.scene.sm2_bake_mode)
+        set_bake_output(BAKE_OUTPUTS['BSDF'])
+        return {'FINISHED'}
 
-            # Select the _spec texture node if found
-            for node in nodes:
-                if node.type == 'TEX_IMAGE' and '_spec' in node.name.lower():
-                    node.select = True
-                    nodes.active = node
 
+class BAKE_OT_remove_switch(bpy.types.Operator):
+    bl_idname = "bake.remove_mode_switch"
+    bl_label = "Remove Bake Mode Switch"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        for tree in bake_switch_groups():
+            remove_bake_switch(tree)
+        context.scene.sm2_bake_mode = 'BSDF'
         return {'FINISHED'}
 
 
@@ -125,21 +1355,110 @@ class BAKE_PT_shader_bake_tools(bpy.types.Panel):
         layout.operator("bake.restore_shader", text="Restore Shader")
         layout.operator("bake.connect_spec_output", text="Connect _spec Bake Output")
 
+        layout.operator("bake.run_queue", text="Bake All SM2 Materials")
+        layout.operator("bake.run_parallel", text="Bake in Parallel")
+        layout.operator("bake.atlas_merge_materials", text="Merge into Atlas")
+
+        box = layout.box()
+        if bake_switch_groups():
+            box.prop(context.scene, "sm2_bake_mode", expand=True)
+            box.operator("bake.remove_mode_switch", text="Remove Mode Switch")
+        else:
+            box.operator("bake.install_mode_switch", text="Install Mode Switch")
+
 
 classes = [
     BAKE_OT_prepare,
     BAKE_OT_restore,
     BAKE_OT_connect_spec,
+    BAKE_OT_bake_queue,
+    BAKE_OT_bake_parallel,
+    BAKE_OT_atlas_merge,
+    BAKE_OT_install_switch,
+    BAKE_OT_remove_switch,
     BAKE_PT_shader_bake_tools,
 ]
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.types.Scene.sm2_bake_mode = bpy.props.EnumProperty(
+        name="Bake Mode",
+        items=[
+            ('BSDF', "BSDF", "Normal shading"),
+            ('BASE', "Base Color", "Route _a/Base Color bake"),
+            ('SPEC', "_spec", "Route _spec bake"),
+        ],
+        default='BSDF',
+        update=update_bake_mode,
+    )
+    bpy.app.handlers.load_post.append(clear_sm2_index)
 
 def unregister():
+    if clear_sm2_index in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_sm2_index)
+    _sm2_index.clear()
+    del bpy.types.Scene.sm2_bake_mode
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 
-if __name__ == "__main__":
+def run_bake_cli(argv):
+    """blender -b scene.blend --python sm2_bake_setup.py -- --sm2-bake-queue --output DIR
+
+    --workers N hands the objects to N background Blender processes instead.
+    """
+    parser = argparse.ArgumentParser(prog="sm2_bake_setup.py")
+    parser.add_argument("--sm2-bake-queue", action="store_true")
+    parser.add_argument("--workers", type=int, default=1, help="Background Blender processes, 0 = half the cores")
+    parser.add_argument("--no-cache", action="store_true", help="Bake everything, ignoring the manifest")
+    parser.add_argument("--keep-settings", action="store_true", help="Bake with the scene's own Cycles settings")
+    parser.add_argument("--job", help="Worker job file written by the parallel bake")
+    parser.add_argument("--output", default="//baked/", help="Folder for the baked images")
+    parser.add_argument("--size", type=int, default=2048, help="Size of new images, or the largest side with --texel-density")
+    parser.add_argument("--texel-density", type=float, default=0.0, help="Pixels per metre to size the targets, 0 = always --size")
+    parser.add_argument("--memory-limit", type=int, default=0, help="Bake buffer budget in MB, 0 = no limit")
+    parser.add_argument("--objects", nargs="*", help="Object names, default all meshes")
+    args = parser.parse_args(argv)
+
     register()
+    context = bpy.context
+    objects = [o for o in context.view_layer.objects if o.type == 'MESH']
+    job = None
+    if args.job:
+        with open(args.job, "r", encoding="utf-8") as f:
+            job = json.load(f)
+        args.objects = job["objects"]
+    if args.objects:
+        objects = [o for o in objects if o.name in args.objects]
+
+    if args.workers != 1 and job is None:
+        summaries = run_parallel_bake(context, objects, args.output, args.size, args.workers, not args.no_cache,
+                                      not args.keep_settings, args.texel_density, args.memory_limit * 1024 * 1024)
+        print_worker_summaries(summaries)
+        return 1 if any(s["error"] or s["failed"] for s in summaries) else 0
+
+    # Workers leave the manifest to the scheduler, which merges all results
+    results, saved = run_bake_queue(context, objects, args.output, args.size, not args.no_cache,
+                                    write_manifest=job is None, fast_profile=not args.keep_settings,
+                                    texel_density=args.texel_density, memory_limit=args.memory_limit * 1024 * 1024)
+    if job is not None:
+        with open(job["result"], "w", encoding="utf-8") as f:
+            json.dump({"results": results, "saved": saved}, f)
+    failed = 0
+    for r in results:
+        if r["error"]:
+            failed += 1
+            print(f"[SM2 Bake] FAILED {r['object']} {r['pass']}: {r['error']}")
+        else:
+            print(f"[SM2 Bake] {r['object']} {r['pass']}{' (cached)' if r['skipped'] else ''} {r['seconds']:.2f}s")
+    for line in bake_cost_report(results):
+        print(f"[SM2 Bake] {line}")
+    print(f"[SM2 Bake] {len(results)} bake(s), {failed} failed, {len(saved)} image(s) saved to {bpy.path.abspath(args.output)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    cli_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--sm2-bake-queue" in cli_args:
+        sys.exit(run_bake_cli(cli_args))
+    else:
+        register()
@@ -1,7 +1,7 @@
 bl_info = {
     "name": "Auto Export to USF and TPL",
     "author": "violet :3",
-    "version": (1, 0),
+    "version": (1, 6),
     "blender": (4, 1, 0),
     "location": "File > Export > glTF 2.0 > Sidebar Panel",
     "description": "Adds a button to glTF export panel to export and auto run ModelConverter.exe and convert_tpl.py",
@@ -9,8 +9,631 @@ bl_info = {
 }
 
 import bpy
+import argparse
+import ast
+import base64
+import collections
+import hashlib
+import json
 import os
+import queue
+import shutil
+import struct
 import subprocess
+import sys
+import threading
+import time
+import types
+import urllib.parse
+
+# ---------- SM2 LOD Duplicator hooks ----------
+
+def lod_tool_available(op_name):
+    # Operators from the SM2 LOD Duplicator add-on, used when it is enabled
+    try:
+        getattr(bpy.ops.object, op_name).get_rna_type()
+        return True
+    except (AttributeError, KeyError):
+        return False
+
+
+# ---------- Persistent converter workers ----------
+
+# Runs in the converter's Python. Jobs arrive as JSON lines on stdin and each
+# runs convert_tpl.py with runpy, so modules it imports stay loaded between
+# assets. Script output and the exit code go back as JSON lines on stdout;
+# output outside a job (preloading, threads left running) is tagged so it
+# isn't mixed into the next job's log. Scripts get an empty stdin, the real
+# one carries the jobs.
+WORKER_SOURCE = r"""
+import ast, contextlib, importlib, io, json, os, runpy, sys, time, traceback
+
+out = sys.stdout
+jobs = sys.stdin
+
+def emit(**event):
+    out.write(json.dumps(event) + "\n")
+    out.flush()
+
+class Stream(io.TextIOBase):
+    def __init__(self, tag=None):
+        self.buf = ""
+        self.tag = tag
+    def write(self, text):
+        self.buf += text
+        while "\n" in self.buf:
+            line, self.buf = self.buf.split("\n", 1)
+            self.emit_line(line)
+        return len(text)
+    def emit_line(self, line):
+        if self.tag:
+            emit(out=line, tag=self.tag)
+        else:
+            emit(out=line)
+    def close_line(self):
+        if self.buf:
+            self.emit_line(self.buf)
+            self.buf = ""
+
+idle = Stream("idle")
+sys.stdout = sys.stderr = idle
+sys.stdin = open(os.devnull)
+
+def add_path(script):
+    folder = os.path.dirname(os.path.abspath(script))
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+def preload(script):
+    # Import the script's top-level imports without running it
+    add_path(script)
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+for line in jobs:
+    idle.close_line()
+    msg = json.loads(line)
+    if "preload" in msg:
+        stream = Stream("preload")
+        with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+            preload(msg["preload"])
+        stream.close_line()
+        continue
+    stream = Stream()
+    code = 0
+    start = time.perf_counter()
+    cwd, argv = os.getcwd(), sys.argv
+    sys.argv = [msg["script"]] + msg["args"]
+    add_path(msg["script"])
+    try:
+        if msg.get("cwd"):
+            os.chdir(msg["cwd"])
+        with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+            try:
+                runpy.run_path(msg["script"], run_name="__main__")
+            except SystemExit as e:
+                if isinstance(e.code, int) or e.code is None:
+                    code = e.code or 0
+                else:
+                    print(e.code)
+                    code = 1
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+        # A fresh empty stdin in case the script closed or replaced it
+        sys.stdin = open(os.devnull)
+        stream.close_line()
+    emit(exit=code, seconds=time.perf_counter() - start)
+"""
+
+class WorkerRun:
+    """Process-like handle of one job running in a ConverterWorker."""
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            self.worker.pump()
+        return self.returncode
+
+    def kill(self):
+        self.worker.stop()
+        self.returncode = -1
+
+    def wait(self):
+        return self.returncode
+
+
+class ConverterWorker:
+    """Long-lived Python that runs convert_tpl.py jobs fed over a pipe."""
+
+    def __init__(self, python):
+        self.python = python
+        self.proc = subprocess.Popen(
+            [python, "-u", "-c", WORKER_SOURCE],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors="replace", bufsize=1,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self.events = queue.Queue()
+        self.preloaded = set()
+        self.run = None
+        self.lines = None
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = {"out": line.rstrip()}
+            self.events.put(event)
+        self.events.put({"exit": -1, "died": True})
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    @property
+    def idle(self):
+        return self.run is None and self.alive
+
+    def _send(self, msg):
+        self.proc.stdin.write(json.dumps(msg) + "\n")
+        self.proc.stdin.flush()
+
+    def submit(self, script, args, cwd, lines):
+        self.run = WorkerRun(self)
+        self.lines = lines
+        if script not in self.preloaded:
+            self._send({"preload": script})
+            self.preloaded.add(script)
+        self._send({"script": script, "args": args, "cwd": cwd})
+        return self.run
+
+    def pump(self):
+        while self.run is not None:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if "tag" in event:
+                # Not part of any job, keep it out of the job's log
+                print(f"[Converter worker {event['tag']}] {event['out']}")
+            elif "out" in event:
+                self.lines.put(event["out"])
+            if "exit" in event:
+                if event.get("died"):
+                    self.lines.put("converter worker exited")
+                self.run.returncode = event["exit"]
+                self.run = None
+
+    def stop(self):
+        if self.alive:
+            self.proc.kill()
+            self.proc.wait()
+
+
+_workers = []
+
+def run_in_worker(argv, cwd, lines, retry=True):
+    """Send [python, script, *args] to an idle worker, starting one if needed.
+
+    A worker found dead is replaced once; if the new one fails too the
+    OSError goes to the caller, which fails the job.
+    """
+    python, script, args = argv[0], argv[1], argv[2:]
+    _workers[:] = [w for w in _workers if w.alive]
+    worker = next((w for w in _workers if w.idle and w.python == python), None)
+    if worker is None:
+        worker = ConverterWorker(python)
+        _workers.append(worker)
+    try:
+        return worker.submit(script, args, cwd, lines)
+    except OSError:
+        # Pipe closed under us, the worker died between jobs
+        worker.stop()
+        _workers.remove(worker)
+        if not retry:
+            raise
+        return run_in_worker(argv, cwd, lines, retry=False)
+
+def stop_converter_workers():
+    for worker in _workers:
+        worker.stop()
+    _workers.clear()
+
+def persistent_stages(prefs):
+    # Stages sent to a persistent worker instead of a fresh interpreter
+    if getattr(prefs, "stub_converter", False):
+        return ()
+    return ("convert_tpl",) if prefs.persistent_converter else ()
+
+
+# ---------- Conversion jobs ----------
+
+LOG_LINES = 200
+POLL_INTERVAL = 0.25
+
+class ConversionJob:
+    """Conversion stages run one after another as tracked processes, no shell.
+
+    stages is a list of (stage name, argv, working dir). poll() advances the
+    job and is called from a bpy.app.timers callback, or in a loop headless.
+    Stages named in persistent run in a ConverterWorker instead of a new process.
+    """
+
+    def __init__(self, name, stages, timeout=0, on_success=None, persistent=()):
+        self.name = name
+        self.stages = stages
+        self.timeout = timeout
+        self.on_success = on_success
+        self.persistent = persistent
+        self.log = collections.deque(maxlen=LOG_LINES)
+        self.results = []  # (stage name, exit code or None, seconds)
+        self.state = 'QUEUED'  # QUEUED, RUNNING, DONE, FAILED, CANCELLED
+        self.proc = None
+        self.stage_index = -1
+        self.stage_start = 0.0
+        self._lines = queue.Queue()
+        self._reader = None
+
+    @property
+    def active(self):
+        return self.state in {'QUEUED', 'RUNNING'}
+
+    @property
+    def stage_name(self):
+        return self.stages[self.stage_index][0] if 0 <= self.stage_index < len(self.stages) else ""
+
+    def _read(self, stream):
+        for line in stream:
+            self._lines.put(line.rstrip())
+        stream.close()
+
+    def _drain(self):
+        while True:
+            try:
+                self.log.append(self._lines.get_nowait())
+            except queue.Empty:
+                return
+
+    def _start_next(self):
+        self.stage_index += 1
+        if self.stage_index >= len(self.stages):
+            self.state = 'DONE'
+            if self.on_success:
+                self.on_success(self)
+            return
+        name, argv, cwd = self.stages[self.stage_index]
+        self.log.append(f"[{name}] {subprocess.list2cmdline(argv)}")
+        self.stage_start = time.perf_counter()
+        self._reader = None
+        if name in self.persistent:
+            try:
+                self.proc = run_in_worker(argv, cwd, self._lines)
+            except OSError as e:
+                self.log.append(f"[{name}] could not start worker: {e}")
+                self.results.append((name, None, 0.0))
+                self.state = 'FAILED'
+                return
+            self.state = 'RUNNING'
+            return
+        try:
+            self.proc = subprocess.Popen(
+                argv, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, errors="replace", bufsize=1,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        except OSError as e:
+            self.log.append(f"[{name}] could not start: {e}")
+            self.results.append((name, None, 0.0))
+            self.state = 'FAILED'
+            return
+        self._reader = threading.Thread(target=self._read, args=(self.proc.stdout,), daemon=True)
+        self._reader.start()
+        self.state = 'RUNNING'
+
+    def _end_stage(self, code, state=None):
+        if self._reader is not None:
+            self._reader.join(timeout=1.0)
+        self._drain()
+        name = self.stage_name
+        seconds = time.perf_counter() - self.stage_start
+        self.results.append((name, code, seconds))
+        self.log.append(f"[{name}] exit {code} after {seconds:.1f}s")
+        if state is not None:
+            self.state = state
+        elif code != 0:
+            self.state = 'FAILED'
+        else:
+            self._start_next()
+
+    def poll(self):
+        """Advance the job, returns True while it still has work."""
+        self._drain()
+        if self.state == 'QUEUED':
+            self._start_next()
+        if self.state != 'RUNNING':
+            return False
+        code = self.proc.poll()
+        if code is None:
+            if self.timeout and time.perf_counter() - self.stage_start > self.timeout:
+                self.proc.kill()
+                self.proc.wait()
+                self.log.append(f"[{self.stage_name}] timed out after {self.timeout}s")
+                self._end_stage(None, 'FAILED')
+                return False
+            return True
+        self._end_stage(code)
+        return self.active
+
+    def cancel(self):
+        if self.state == 'RUNNING':
+            self.proc.kill()
+            self.proc.wait()
+            self._end_stage(None, 'CANCELLED')
+        elif self.state == 'QUEUED':
+            self.state = 'CANCELLED'
+
+    def summary(self):
+        stages = ", ".join(f"{name} exit {code} {seconds:.1f}s" for name, code, seconds in self.results)
+        return f"{self.name}: {self.state} ({stages})"
+
+
+_jobs = []
+
+_pool_limit = None  # set by the command line, overrides the preference
+
+def conversion_limit():
+    # Conversions allowed to run at once
+    if _pool_limit:
+        return _pool_limit
+    addon = bpy.context.preferences.addons.get(__name__)
+    if addon is not None:
+        return addon.preferences.max_conversions
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def poll_job(job):
+    # An error in one job (an on_success callback, a manifest write) is logged
+    # on that job, it must not stop the timer driving all the others
+    try:
+        return job.poll()
+    except Exception as e:
+        job.log.append(f"[{job.stage_name or job.name}] {type(e).__name__}: {e}")
+        if job.active:
+            job.state = 'FAILED'
+        return False
+
+def pump_conversion_jobs():
+    """Advance running jobs, then start queued ones while the pool has room."""
+    running = 0
+    for job in _jobs:
+        if job.state == 'RUNNING':
+            if poll_job(job):
+                running += 1
+            else:
+                print(f"[TPL Export] {job.summary()}")
+    limit = conversion_limit()
+    for job in _jobs:
+        if running >= limit:
+            break
+        if job.state == 'QUEUED':
+            if poll_job(job):
+                running += 1
+            else:
+                print(f"[TPL Export] {job.summary()}")
+
+def poll_conversion_jobs():
+    pump_conversion_jobs()
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return POLL_INTERVAL if any(job.active for job in _jobs) else None
+
+def start_conversion_job(job):
+    _jobs.append(job)
+    pump_conversion_jobs()
+    if not bpy.app.timers.is_registered(poll_conversion_jobs):
+        # Persistent, the jobs keep running and reporting when another file is opened
+        bpy.app.timers.register(poll_conversion_jobs, first_interval=POLL_INTERVAL, persistent=True)
+    return job
+
+def python_command(prefs):
+    if prefs.python_executable:
+        return bpy.path.abspath(prefs.python_executable)
+    return shutil.which("python" if os.name == 'nt' else "python3") or "python3"
+
+def tpl_folder_for(convert_tpl):
+    # project\resources\tpl relative to convert_tpl.py
+    return os.path.normpath(os.path.join(os.path.dirname(convert_tpl), "project", "resources", "tpl"))
+
+# Stand-in for both converters on build machines without them:
+# sleeps, then copies input to output (.gltf -> .usf -> .tpl)
+STUB_CONVERTER = "import shutil, sys, time; time.sleep(float(sys.argv[1])); shutil.copyfile(sys.argv[2], sys.argv[3])"
+
+def stub_stages(prefs, export_path):
+    base = os.path.splitext(export_path)[0]
+    seconds = str(getattr(prefs, "stub_seconds", 0.0))
+    python = sys.executable
+    return [
+        ("ModelConverter", [python, "-c", STUB_CONVERTER, seconds, export_path, base + ".usf"], None),
+        ("convert_tpl", [python, "-c", STUB_CONVERTER, seconds, base + ".usf", base + ".tpl"], None),
+    ]
+
+def conversion_stages(prefs, export_path):
+    """ModelConverter then convert_tpl.py for one exported glTF."""
+    if getattr(prefs, "stub_converter", False):
+        return stub_stages(prefs, export_path)
+    model_converter = bpy.path.abspath(prefs.model_converter_path)
+    convert_tpl = bpy.path.abspath(prefs.convert_tpl_script)
+    usf_path = os.path.splitext(export_path)[0] + ".usf"
+    working_dir = os.path.dirname(model_converter)
+    return [
+        ("ModelConverter", [model_converter, export_path], working_dir),
+        ("convert_tpl", [python_command(prefs), convert_tpl, usf_path], working_dir),
+    ]
+
+def open_folder(path):
+    if os.name == 'nt':
+        os.startfile(path)
+    else:
+        subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", path])
+
+
+# ---------- Incremental export ----------
+
+EXPORT_MANIFEST = "tpl_export_manifest.json"
+# Parts of the exported glTF each stage reads; a stage re-runs when one of them
+# changed, and every stage after it re-runs too. ModelConverter only turns the
+# meshes into .usf, textures are picked up by convert_tpl.py.
+STAGE_INPUTS = {"ModelConverter": ("geometry",), "convert_tpl": ("geometry", "textures")}
+
+def file_stat_digest(h, path):
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        h.update(repr((path, stat.st_size, stat.st_mtime_ns)).encode())
+
+def read_uri(folder, uri):
+    if uri.startswith("data:"):
+        return base64.b64decode(uri.split(",", 1)[1])
+    path = os.path.join(folder, urllib.parse.unquote(uri))
+    if not os.path.isfile(path):
+        return b""
+    with open(path, "rb") as f:
+        return f.read()
+
+def gltf_content_hashes(path):
+    """Hashes of the geometry and the texture parts of an exported .gltf/.glb."""
+    folder = os.path.dirname(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    glb_bin = b""
+    if data[:4] == b"glTF":
+        json_length = struct.unpack_from("<I", data, 12)[0]
+        doc = json.loads(data[20:20 + json_length])
+        glb_bin = data[28 + json_length:]
+    else:
+        doc = json.loads(data)
+
+    buffers = [read_uri(folder, b["uri"]) if "uri" in b else glb_bin for b in doc.get("buffers", [])]
+
+    def view_bytes(index):
+        view = doc["bufferViews"][index]
+        start = view.get("byteOffset", 0)
+        return buffers[view["buffer"]][start:start + view["byteLength"]]
+
+    geometry, textures = hashlib.sha1(), hashlib.sha1()
+    image_views = set()
+    for image in doc.get("images", []):
+        if "uri" in image:
+            textures.update(read_uri(folder, image.pop("uri")))
+        elif "bufferView" in image:
+            image_views.add(image["bufferView"])
+            textures.update(view_bytes(image["bufferView"]))
+    for index in range(len(doc.get("bufferViews", []))):
+        if index not in image_views:
+            geometry.update(view_bytes(index))
+    for buffer in doc.get("buffers", []):
+        buffer.pop("uri", None)
+    geometry.update(json.dumps(doc, sort_keys=True).encode())
+    return {"geometry": geometry.hexdigest(), "textures": textures.hexdigest()}
+
+def stage_keys(stages, content, export_path):
+    """Input hash per stage: the content parts it reads and the tool itself."""
+    asset_base = os.path.splitext(export_path)[0]
+    keys = {}
+    for name, argv, _cwd in stages:
+        h = hashlib.sha1()
+        for part in STAGE_INPUTS.get(name, ("geometry", "textures")):
+            h.update(content[part].encode())
+        for arg in argv:
+            # Tools and scripts, not the asset's own files
+            if not arg.startswith(asset_base):
+                h.update(arg.encode())
+                file_stat_digest(h, arg)
+        keys[name] = h.hexdigest()
+    return keys
+
+def load_export_manifest(folder):
+    path = os.path.join(folder, EXPORT_MANIFEST)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("assets", {})
+    except (OSError, ValueError):
+        return {}
+
+def update_export_manifest(folder, asset, entry):
+    # entry None drops the asset, a file without a manifest keeps none
+    assets = load_export_manifest(folder)
+    if entry is None:
+        if asset not in assets:
+            return
+        del assets[asset]
+    else:
+        assets[asset] = entry
+    with open(os.path.join(folder, EXPORT_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "assets": assets}, f, indent=1, sort_keys=True)
+
+def export_outputs_exist(export_path):
+    usf_path = os.path.splitext(export_path)[0] + ".usf"
+    return os.path.isfile(export_path) and os.path.isfile(usf_path)
+
+def incremental_export(prefs, export_path, export, on_success=None, force=False):
+    """Export one asset and queue only the conversion stages whose inputs changed.
+
+    export() writes the glTF every time: the written file is what the stages
+    read, so any edit that reaches it counts. Returns 'UNCHANGED' when no
+    stage had to run, or 'CONVERTING'. The asset's manifest entry is dropped
+    before any stage runs and written again only once the job succeeded, so
+    a failed or non-incremental run never leaves outputs behind an old entry.
+    """
+    folder = os.path.dirname(export_path)
+    asset = os.path.basename(export_path)
+    stages = conversion_stages(prefs, export_path)
+    export()
+    if not prefs.incremental_export:
+        update_export_manifest(folder, asset, None)
+        start_conversion_job(ConversionJob(asset, stages, prefs.conversion_timeout, on_success, persistent_stages(prefs)))
+        return 'CONVERTING'
+
+    entry = {} if force else load_export_manifest(folder).get(asset, {})
+    keys = stage_keys(stages, gltf_content_hashes(export_path), export_path)
+    done = entry.get("stages", {}) if export_outputs_exist(export_path) else {}
+    # First stage whose inputs changed, it and everything after re-run
+    first = next((i for i, (name, _argv, _cwd) in enumerate(stages) if done.get(name) != keys[name]), len(stages))
+    if first == len(stages):
+        return 'UNCHANGED'
+
+    def record(job):
+        update_export_manifest(folder, asset, {"stages": keys})
+        if on_success:
+            on_success(job)
+
+    update_export_manifest(folder, asset, None)
+    start_conversion_job(ConversionJob(asset, stages[first:], prefs.conversion_timeout, record, persistent_stages(prefs)))
+    return 'CONVERTING'
+
 
 # ---------- Preferences ----------
 
@@ -29,6 +652,51 @@ class GLTFExportAutoConvertPreferences(bpy.types.AddonPreferences):
         description="Path to convert_tpl.py (choose .py file)"
     )
 
+    optimize_vertex_cache: bpy.props.BoolProperty(
+        name="Optimize Vertex Cache Before Export",
+        description="Export copies of the meshes with triangles and vertices reordered for GPU vertex cache reuse, the scene keeps its own order (needs SM2 LOD Duplicator)",
+        default=False,
+    )
+
+    python_executable: bpy.props.StringProperty(
+        name="Python for convert_tpl.py",
+        subtype='FILE_PATH',
+        description="Interpreter running convert_tpl.py, empty = python (Windows) or python3 from PATH",
+    )
+
+    conversion_timeout: bpy.props.IntProperty(
+        name="Stage Timeout (s)",
+        description="Kill a conversion stage running longer than this, 0 = no limit",
+        default=600,
+        min=0,
+    )
+
+    max_conversions: bpy.props.IntProperty(
+        name="Parallel Conversions",
+        description="Conversion jobs running at once, the rest wait in the queue",
+        default=max(1, (os.cpu_count() or 2) // 2),
+        min=1,
+        max=64,
+    )
+
+    incremental_export: bpy.props.BoolProperty(
+        name="Skip Unchanged Conversions",
+        description="Keep content hashes of the exported glTF files and only re-run the conversion stages whose inputs changed",
+        default=True,
+    )
+
+    persistent_converter: bpy.props.BoolProperty(
+        name="Persistent convert_tpl.py Worker",
+        description="Run convert_tpl.py in long-lived Python workers fed over a pipe, so interpreter start and imports are paid once",
+        default=False,
+    )
+
+    open_tpl_folder: bpy.props.BoolProperty(
+        name="Open TPL Folder When Done",
+        description="Open project/resources/tpl after a successful conversion",
+        default=True,
+    )
+
     def draw(self, context):
         layout = self.layout
 
@@ -40,6 +708,14 @@ class GLTFExportAutoConvertPreferences(bpy.types.AddonPreferences):
         row.prop(self, "convert_tpl_script")
         row.operator("gltf_autoconvert.pick_convertpy", text="Browse .py")
 
+        layout.prop(self, "optimize_vertex_cache")
+        layout.prop(self, "python_executable")
+        layout.prop(self, "conversion_timeout")
+        layout.prop(self, "max_conversions")
+        layout.prop(self, "incremental_export")
+        layout.prop(self, "persistent_converter")
+        layout.prop(self, "open_tpl_folder")
+
 
 # ---------- File picker operators ----------
 
@@ -108,91 +784,522 @@ class GLTF_PT_auto_convert_button(bpy.types.Panel):
             prefs = prefs.preferences
             layout.prop(prefs, "model_converter_path")
             layout.prop(prefs, "convert_tpl_script")
+            layout.prop(prefs, "optimize_vertex_cache")
         layout.operator("export_scene.gltf_auto_convert_button", icon='EXPORT')
+        layout.operator("export_scene.gltf_batch_auto_convert", text="Batch Export Collections", icon='PACKAGE').mode = 'COLLECTIONS'
+        layout.operator("export_scene.gltf_batch_auto_convert", text="Batch Export Top-Level Objects", icon='PACKAGE').mode = 'OBJECTS'
 
 
 # ---------- Main operator ----------
 
+def converter_path_error(prefs):
+    if getattr(prefs, "stub_converter", False):
+        return None
+    if not os.path.isfile(bpy.path.abspath(prefs.model_converter_path)):
+        return "ModelConverter.exe path invalid or not set."
+    if not os.path.isfile(bpy.path.abspath(prefs.convert_tpl_script)):
+        return "convert_tpl.py path invalid or not set."
+    return None
+
+def gltf_export_args(context):
+    """Settings of the glTF export operator open in the file browser, or an error."""
+    export_op = context.space_data.active_operator
+    if export_op is None or export_op.bl_idname != "EXPORT_SCENE_OT_gltf":
+        return None, "GLTF export operator not found."
+    if not export_op.filepath:
+        return None, "No export filepath specified."
+
+    # Copy all export operator properties except internal ones
+    args = {}
+    exclude_props = {'bl_idname', 'bl_label', 'bl_options', 'bl_rna', 'rna_type', 'filepath'}
+    for prop_name in export_op.properties.bl_rna.properties.keys():
+        if prop_name not in exclude_props:
+            args[prop_name] = getattr(export_op, prop_name)
+    args['filepath'] = export_op.filepath
+    return args, None
+
+def export_objects(context, args):
+    """Objects the glTF exporter will pick with these settings."""
+    if args.get('use_active_collection'):
+        coll = context.view_layer.active_layer_collection.collection
+        objects = list(coll.all_objects if args.get('use_active_collection_with_nested', True) else coll.objects)
+    else:
+        objects = list(context.view_layer.objects)
+    if args.get('use_selection'):
+        objects = [o for o in objects if o.select_get()]
+    if args.get('use_visible'):
+        objects = [o for o in objects if o.visible_get()]
+    if args.get('use_renderable'):
+        objects = [o for o in objects if not o.hide_render]
+    return objects
+
+def optimize_exported_meshes(context, prefs, objects):
+    """Swap reordered mesh copies onto the objects, True if restore_exported_meshes is due."""
+    if not (prefs.optimize_vertex_cache and lod_tool_available("sm2_optimize_vertex_cache")):
+        return False
+    view_layer = context.view_layer
+    selected = [o for o in view_layer.objects if o.select_get()]
+    objects = set(objects)
+    try:
+        for obj in view_layer.objects:
+            obj.select_set(obj in objects)
+        bpy.ops.object.sm2_optimize_vertex_cache(temporary=True)
+    finally:
+        for obj in view_layer.objects:
+            obj.select_set(obj in selected)
+    return True
+
+def restore_exported_meshes():
+    bpy.ops.object.sm2_restore_vertex_cache()
+
 class EXPORT_OT_gltf_auto_convert_button(bpy.types.Operator):
     """Export using current GLTF settings and then auto run ModelConverter and convert_tpl.py"""
     bl_idname = "export_scene.gltf_auto_convert_button"
     bl_label = "Export and Auto Convert to USF/TPL"
     bl_options = {'REGISTER'}
 
+    force: bpy.props.BoolProperty(
+        name="Force Full Export",
+        description="Export and run every conversion stage even if nothing changed",
+        options={'SKIP_SAVE'},
+    )
+
     def execute(self, context):
         prefs = context.preferences.addons[__name__].preferences
-        model_converter = bpy.path.abspath(prefs.model_converter_path)
         convert_tpl = bpy.path.abspath(prefs.convert_tpl_script)
+        error = converter_path_error(prefs)
+        if error is None:
+            args, error = gltf_export_args(context)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+        export_path = args['filepath']
+
+        def export():
+            # Export GLTF with current settings, with real meshes for any LOD proxies
+            use_lod_proxies = lod_tool_available("sm2_materialize_lod_proxies")
+            if use_lod_proxies:
+                bpy.ops.object.sm2_materialize_lod_proxies(temporary=True)
+            optimized = False
+            try:
+                optimized = optimize_exported_meshes(context, prefs, export_objects(context, args))
+                bpy.ops.export_scene.gltf(**args)
+            finally:
+                if optimized:
+                    restore_exported_meshes()
+                if use_lod_proxies:
+                    bpy.ops.object.sm2_restore_lod_proxies()
 
-        if not os.path.isfile(model_converter):
-            self.report({'ERROR'}, "ModelConverter.exe path invalid or not set.")
+        tpl_folder = tpl_folder_for(convert_tpl)
+        on_success = (lambda job: open_folder(tpl_folder)) if prefs.open_tpl_folder else None
+        status = incremental_export(prefs, export_path, export, on_success, self.force)
+
+        if status == 'UNCHANGED':
+            self.report({'INFO'}, "Exported GLTF, converter inputs unchanged, conversion skipped.")
+        else:
+            self.report({'INFO'}, "Exported GLTF, conversion running (see SM2 Tools > TPL Conversion).")
+        return {'FINISHED'}
+
+
+# Scene helpers that aren't part of an asset
+BATCH_SKIP_TYPES = {'CAMERA', 'LIGHT', 'LIGHT_PROBE', 'SPEAKER'}
+
+def layer_collections(layer_coll):
+    # The view layer's collection tree, without excluded branches
+    yield layer_coll
+    for child in layer_coll.children:
+        if not child.exclude:
+            yield from layer_collections(child)
+
+def batch_assets(context, mode):
+    """(name, objects) per collection, or per top-level object with its children.
+
+    A collection asset holds only the objects linked directly to it, nested
+    collections are assets of their own and objects linked to the scene
+    collection form one named after the scene.
+    """
+    view_layer_objects = {o for o in context.view_layer.objects if o.type not in BATCH_SKIP_TYPES}
+    assets = []
+    if mode == 'COLLECTIONS':
+        for layer_coll in layer_collections(context.view_layer.layer_collection):
+            coll = layer_coll.collection
+            objects = [o for o in coll.objects if o in view_layer_objects]
+            if objects:
+                name = context.scene.name if coll == context.scene.collection else coll.name
+                assets.append((name, objects))
+    else:
+        for obj in context.view_layer.objects:
+            if obj.parent is None and obj in view_layer_objects:
+                assets.append((obj.name, [obj] + [o for o in obj.children_recursive if o in view_layer_objects]))
+    return assets
+
+
+class EXPORT_OT_gltf_batch_auto_convert(bpy.types.Operator):
+    """Export every collection or top-level object to its own glTF and convert them in parallel"""
+    bl_idname = "export_scene.gltf_batch_auto_convert"
+    bl_label = "Batch Export and Convert"
+    bl_options = {'REGISTER'}
+
+    mode: bpy.props.EnumProperty(
+        name="Assets",
+        items=[
+            ('COLLECTIONS', "Collections", "One glTF per collection with the objects linked directly to it"),
+            ('OBJECTS', "Top-Level Objects", "One glTF per object without a parent, children included"),
+        ],
+        default='COLLECTIONS',
+    )
+    force: bpy.props.BoolProperty(
+        name="Force Full Export",
+        description="Export and convert every asset even if nothing changed",
+        options={'SKIP_SAVE'},
+    )
+
+    def execute(self, context):
+        prefs = context.preferences.addons[__name__].preferences
+        error = converter_path_error(prefs)
+        if error is None:
+            self.args, error = gltf_export_args(context)
+        if error:
+            self.report({'ERROR'}, error)
             return {'CANCELLED'}
-        if not os.path.isfile(convert_tpl):
-            self.report({'ERROR'}, "convert_tpl.py path invalid or not set.")
+        self.assets = batch_assets(context, self.mode)
+        if not self.assets:
+            self.report({'WARNING'}, "Nothing to export.")
             return {'CANCELLED'}
 
-        export_op = context.space_data.active_operator
-        if export_op is None or export_op.bl_idname != "EXPORT_SCENE_OT_gltf":
-            self.report({'ERROR'}, "GLTF export operator not found.")
+        self.folder = os.path.dirname(self.args['filepath'])
+        self.ext = ".glb" if self.args.get('export_format') == 'GLB' else ".gltf"
+        self.args['use_selection'] = True
+        self.args['use_active_collection'] = False
+        self.index = 0
+        self.counts = {}
+        self.failed = []
+        self.selected = [o for o in context.view_layer.objects if o.select_get()]
+        self.active = context.view_layer.objects.active
+
+        # Proxies and vertex cache handled once for the whole batch
+        self.use_lod_proxies = lod_tool_available("sm2_materialize_lod_proxies")
+        if self.use_lod_proxies:
+            bpy.ops.object.sm2_materialize_lod_proxies(temporary=True)
+        self.optimized = optimize_exported_meshes(
+            context, prefs, [o for name, objects in self.assets for o in objects])
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def export_next(self, context):
+        prefs = context.preferences.addons[__name__].preferences
+        name, objects = self.assets[self.index]
+        self.index += 1
+        for obj in context.view_layer.objects:
+            obj.select_set(obj in objects)
+        context.view_layer.objects.active = objects[0]
+        export_path = os.path.join(self.folder, bpy.path.clean_name(name) + self.ext)
+        args = dict(self.args, filepath=export_path)
+        # Queued right away, the pool converts while the next glTF is written
+        status = incremental_export(prefs, export_path, lambda: bpy.ops.export_scene.gltf(**args), force=self.force)
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self.timer)
+        if self.optimized:
+            restore_exported_meshes()
+        if self.use_lod_proxies:
+            bpy.ops.object.sm2_restore_lod_proxies()
+        for obj in context.view_layer.objects:
+            obj.select_set(obj in self.selected)
+        context.view_layer.objects.active = self.active
+        context.workspace.status_text_set(None)
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.finish(context)
+            self.report({'WARNING'}, f"Batch stopped after {self.index} of {len(self.assets)} export(s)"
+                                     f"{self.failed_text()}.")
             return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        try:
+            self.export_next(context)
+        except Exception as e:
+            name = self.assets[self.index - 1][0]
+            self.failed.append(name)
+            print(f"[TPL Export] Export of {name} failed: {e}")
+        context.workspace.status_text_set(f"Exporting {self.index}/{len(self.assets)} (Esc to stop)")
+        if self.index < len(self.assets):
+            return {'RUNNING_MODAL'}
+        self.finish(context)
+        self.report({'WARNING'} if self.failed else {'INFO'},
+                    f"{len(self.assets)} asset(s): {self.counts.get('CONVERTING', 0)} converting, "
+                    f"{self.counts.get('UNCHANGED', 0)} unchanged{self.failed_text()} "
+                    f"(see SM2 Tools > TPL Conversion).")
+        return {'FINISHED'}
+
+    def failed_text(self):
+        return f", {len(self.failed)} export(s) failed: {', '.join(self.failed)}" if self.failed else ""
+
+
+class EXPORT_OT_tpl_job_cancel(bpy.types.Operator):
+    bl_idname = "export_scene.tpl_job_cancel"
+    bl_label = "Cancel Conversion"
+    bl_options = {'INTERNAL'}
+
+    index: bpy.props.IntProperty()
+
+    def execute(self, context):
+        if 0 <= self.index < len(_jobs):
+            _jobs[self.index].cancel()
+        return {'FINISHED'}
+
+
+class EXPORT_OT_tpl_jobs_clear(bpy.types.Operator):
+    bl_idname = "export_scene.tpl_jobs_clear"
+    bl_label = "Clear Finished Conversions"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        _jobs[:] = [job for job in _jobs if job.active]
+        return {'FINISHED'}
+
+
+class EXPORT_OT_tpl_workers_stop(bpy.types.Operator):
+    bl_idname = "export_scene.tpl_workers_stop"
+    bl_label = "Stop Converter Workers"
+    bl_description = "Stop the persistent convert_tpl.py workers, the next conversion starts fresh ones"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        stop_converter_workers()
+        return {'FINISHED'}
+
+
+class EXPORT_OT_tpl_open_folder(bpy.types.Operator):
+    bl_idname = "export_scene.tpl_open_folder"
+    bl_label = "Open TPL Folder"
+    bl_options = {'INTERNAL'}
 
-        export_path = export_op.filepath
-        if not export_path:
-            self.report({'ERROR'}, "No export filepath specified.")
+    def execute(self, context):
+        prefs = context.preferences.addons[__name__].preferences
+        folder = tpl_folder_for(bpy.path.abspath(prefs.convert_tpl_script))
+        if not os.path.isdir(folder):
+            self.report({'ERROR'}, f"Folder not found: {folder}")
             return {'CANCELLED'}
+        open_folder(folder)
+        return {'FINISHED'}
 
-        # Copy all export operator properties except internal ones
-        args = {}
-        exclude_props = {'bl_idname', 'bl_label', 'bl_options', 'bl_rna', 'rna_type', 'filepath'}
-        for prop_name in export_op.properties.bl_rna.properties.keys():
-            if prop_name not in exclude_props:
-                args[prop_name] = getattr(export_op, prop_name)
-        args['filepath'] = export_path
 
-        # Export GLTF with current settings
-        bpy.ops.export_scene.gltf(**args)
+# ---------- Conversion log panel ----------
 
-        folder = os.path.dirname(export_path)
-        basename = os.path.splitext(os.path.basename(export_path))[0]
-        usf_path = os.path.join(folder, basename + ".usf")
+JOB_ICONS = {'QUEUED': 'TIME', 'RUNNING': 'SORTTIME', 'DONE': 'CHECKMARK', 'FAILED': 'ERROR', 'CANCELLED': 'CANCEL'}
 
-        working_dir = os.path.dirname(model_converter)
+class EXPORT_PT_tpl_conversion_jobs(bpy.types.Panel):
+    bl_label = "TPL Conversion"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'SM2 Tools'
 
-        def quote_path(path):
-            if ' ' in path or '(' in path or ')' in path:
-                return f'"{path}"'
-            else:
-                return path
+    log_lines = 8
 
-        # Open project\resources\tpl folder relative to convert_tpl.py
-        tpl_folder = os.path.normpath(os.path.join(os.path.dirname(convert_tpl), "project", "resources", "tpl"))
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row(align=True)
+        row.operator("export_scene.tpl_open_folder", icon='FILE_FOLDER')
+        row.operator("export_scene.tpl_jobs_clear", text="", icon='TRASH')
+        workers = sum(1 for w in _workers if w.alive)
+        if workers:
+            layout.operator("export_scene.tpl_workers_stop", text=f"Stop Converter Workers ({workers})", icon='CANCEL')
+        if not _jobs:
+            layout.label(text="No conversions yet")
+            return
+        for index in reversed(range(len(_jobs))):
+            job = _jobs[index]
+            box = layout.box()
+            row = box.row()
+            row.label(text=f"{job.name}: {job.state.lower()}", icon=JOB_ICONS[job.state])
+            if job.active:
+                row.operator("export_scene.tpl_job_cancel", text="", icon='X').index = index
+            col = box.column(align=True)
+            for name, code, seconds in job.results:
+                col.label(text=f"{name}: exit {code}, {seconds:.1f}s")
+            if job.state == 'RUNNING':
+                col.label(text=f"{job.stage_name}: running {time.perf_counter() - job.stage_start:.0f}s")
+            for line in list(job.log)[-self.log_lines:]:
+                col.label(text=line)
 
-        # Build the command to run ModelConverter.exe and convert_tpl.py
-        if os.name == 'nt':
-            cmd = (
-                f'{quote_path(model_converter)} {quote_path(export_path)} && '
-                f'python {quote_path(convert_tpl)} {quote_path(usf_path)} && exit'
-            )
-            subprocess.Popen(
-                ['cmd.exe', '/c', 'start', '', 'cmd.exe', '/k', cmd],
-                cwd=working_dir,
-            )
 
-            # Open tpl_folder in explorer after conversion
-            subprocess.Popen(['explorer', tpl_folder])
+# ---------- Command line ----------
 
+# Exit codes of the command line export
+EXIT_OK, EXIT_CONVERSION_FAILED, EXIT_USAGE, EXIT_EXPORT_FAILED = 0, 1, 2, 3
+
+def load_gltf_preset(name):
+    """glTF export settings from an operator preset name or .py path."""
+    path = name
+    if not os.path.isfile(path):
+        for folder in bpy.utils.preset_paths("operator/export_scene.gltf"):
+            candidate = os.path.join(folder, bpy.path.ensure_ext(name, ".py"))
+            if os.path.isfile(candidate):
+                path = candidate
+                break
         else:
-            cmd = (
-                f'{quote_path(model_converter)} {quote_path(export_path)} && '
-                f'python3 {quote_path(convert_tpl)} {quote_path(usf_path)} && exit'
-            )
-            subprocess.Popen(cmd, shell=True, cwd=working_dir)
+            raise FileNotFoundError(f"glTF preset '{name}' not found")
+    # Presets are "op.setting = value" lines, read them without running the file
+    args = {}
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "op":
+                try:
+                    args[target.attr] = ast.literal_eval(node.value)
+                except ValueError:
+                    pass
+    return args
 
-            # Open tpl_folder in default file manager after conversion (Linux/Mac)
-            subprocess.Popen(['xdg-open', tpl_folder])
+def cli_settings(args):
+    """Preferences-like settings for the jobs, from the add-on if installed and the arguments."""
+    addon = bpy.context.preferences.addons.get("tpl_export")
+    base = addon.preferences if addon is not None else None
+    def pick(value, attr, default):
+        if value is not None:
+            return value
+        return getattr(base, attr) if base is not None else default
+    return types.SimpleNamespace(
+        model_converter_path=pick(args.model_converter, "model_converter_path", ""),
+        convert_tpl_script=pick(args.convert_tpl, "convert_tpl_script", ""),
+        python_executable=pick(args.python, "python_executable", ""),
+        conversion_timeout=pick(args.timeout, "conversion_timeout", 600),
+        max_conversions=pick(args.workers, "max_conversions", max(1, (os.cpu_count() or 2) // 2)),
+        incremental_export=pick(None, "incremental_export", True),
+        persistent_converter=args.persistent or pick(None, "persistent_converter", False),
+        optimize_vertex_cache=pick(None, "optimize_vertex_cache", False),
+        open_tpl_folder=False,
+        stub_converter=args.stub_converter,
+        stub_seconds=args.stub_seconds,
+    )
 
-        self.report({'INFO'}, "Exported GLTF and launched auto convert processes, opened TPL folder.")
-        return {'FINISHED'}
+def parse_cli_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="tpl_export.py",
+        description="blender -b scene.blend --python tpl_export.py -- --sm2-export --output out/asset.gltf",
+    )
+    parser.add_argument("--sm2-export", action="store_true")
+    parser.add_argument("--output", required=True, help="glTF path, or the folder-giving path for --batch")
+    parser.add_argument("--settings", help="JSON file of glTF export settings")
+    parser.add_argument("--preset", help="glTF export operator preset name or .py path")
+    parser.add_argument("--batch", choices=("collections", "objects"), help="One glTF per collection or top-level object")
+    parser.add_argument("--model-converter", help="ModelConverter.exe path")
+    parser.add_argument("--convert-tpl", help="convert_tpl.py path")
+    parser.add_argument("--python", help="Interpreter for convert_tpl.py")
+    parser.add_argument("--timeout", type=int, help="Stage timeout in seconds, 0 = none")
+    parser.add_argument("--workers", type=int, help="Conversions running at once")
+    parser.add_argument("--persistent", action="store_true", help="Run convert_tpl.py in persistent workers")
+    parser.add_argument("--force", action="store_true", help="Ignore the export manifest")
+    parser.add_argument("--stub-converter", action="store_true", help="Stand-in converters that copy files, for CI")
+    parser.add_argument("--stub-seconds", type=float, default=0.0, help="Time each stub stage takes")
+    parser.add_argument("--report", help="Write a JSON report of every asset and stage here")
+    return parser.parse_args(argv)
+
+def run_cli_export(argv):
+    """Export and convert without a UI, returns the process exit code."""
+    global _pool_limit
+    start = time.perf_counter()
+    try:
+        args = parse_cli_args(argv)
+    except SystemExit:
+        return EXIT_USAGE
+    prefs = cli_settings(args)
+    error = converter_path_error(prefs)
+    if error:
+        print(f"[TPL Export] {error}")
+        return EXIT_USAGE
+    _pool_limit = prefs.max_conversions
+
+    try:
+        export_args = load_gltf_preset(args.preset) if args.preset else {}
+        if args.settings:
+            with open(args.settings, "r", encoding="utf-8") as f:
+                export_args.update(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"[TPL Export] Can't read export settings: {e}")
+        return EXIT_USAGE
+    output = os.path.abspath(bpy.path.abspath(args.output))
+    export_args['filepath'] = output
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    context = bpy.context
+    if args.batch:
+        ext = ".glb" if export_args.get('export_format') == 'GLB' else ".gltf"
+        export_args.update(use_selection=True, use_active_collection=False)
+        assets = [(os.path.join(os.path.dirname(output), bpy.path.clean_name(name) + ext), objects)
+                  for name, objects in batch_assets(context, args.batch.upper())]
+    else:
+        assets = [(output, None)]
+
+    use_lod_proxies = lod_tool_available("sm2_materialize_lod_proxies")
+    if use_lod_proxies:
+        bpy.ops.object.sm2_materialize_lod_proxies(temporary=True)
+    statuses = {}
+    export_failed = False
+    optimized = False
+    try:
+        exported = ([o for export_path, objects in assets for o in objects] if args.batch
+                    else export_objects(context, export_args))
+        optimized = optimize_exported_meshes(context, prefs, exported)
+        for export_path, objects in assets:
+            if args.batch:
+                for obj in context.view_layer.objects:
+                    obj.select_set(obj in objects)
+            asset_args = dict(export_args, filepath=export_path)
+            export_start = time.perf_counter()
+            try:
+                statuses[export_path] = incremental_export(
+                    prefs, export_path, lambda: bpy.ops.export_scene.gltf(**asset_args), force=args.force)
+            except Exception as e:
+                print(f"[TPL Export] Export of {export_path} failed: {e}")
+                statuses[export_path] = 'EXPORT_FAILED'
+                export_failed = True
+                continue
+            print(f"[TPL Export] {os.path.basename(export_path)}: {statuses[export_path].lower()} "
+                  f"({time.perf_counter() - export_start:.2f}s)")
+    finally:
+        if optimized:
+            restore_exported_meshes()
+        if use_lod_proxies:
+            bpy.ops.object.sm2_restore_lod_proxies()
+
+    # No event loop in background mode, drive the pool here
+    while any(job.active for job in _jobs):
+        pump_conversion_jobs()
+        time.sleep(POLL_INTERVAL / 5)
+    stop_converter_workers()
+
+    failed = [job for job in _jobs if job.state != 'DONE']
+    for job in failed:
+        print(f"[TPL Export] --- log of {job.name} ---")
+        for line in job.log:
+            print(f"    {line}")
+    total = time.perf_counter() - start
+    print(f"[TPL Export] {len(assets)} asset(s), {len(_jobs)} conversion(s), {len(failed)} failed, "
+          f"{sum(1 for s in statuses.values() if s == 'UNCHANGED')} unchanged in {total:.1f}s")
+
+    if args.report:
+        report = {
+            "seconds": total,
+            "assets": {path: status for path, status in statuses.items()},
+            "jobs": [{"name": job.name, "state": job.state,
+                      "stages": [{"name": n, "exit": code, "seconds": sec} for n, code, sec in job.results]}
+                     for job in _jobs],
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+    if export_failed:
+        return EXIT_EXPORT_FAILED
+    return EXIT_CONVERSION_FAILED if failed else EXIT_OK
 
 
 # ---------- Register ----------
@@ -203,6 +1310,12 @@ classes = (
     GLTF_OT_pick_convertpy,
     GLTF_PT_auto_convert_button,
     EXPORT_OT_gltf_auto_convert_button,
+    EXPORT_OT_gltf_batch_auto_convert,
+    EXPORT_OT_tpl_job_cancel,
+    EXPORT_OT_tpl_jobs_clear,
+    EXPORT_OT_tpl_workers_stop,
+    EXPORT_OT_tpl_open_folder,
+    EXPORT_PT_tpl_conversion_jobs,
 )
 
 def register():
@@ -211,9 +1324,19 @@ def register():
 
 
 def unregister():
+    if bpy.app.timers.is_registered(poll_conversion_jobs):
+        bpy.app.timers.unregister(poll_conversion_jobs)
+    for job in _jobs:
+        job.cancel()
+    _jobs.clear()
+    stop_converter_workers()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 
 
 if __name__ == "__main__":
-    register()
+    cli_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--sm2-export" in cli_args:
+        sys.exit(run_cli_export(cli_args))
+    else:
+        register()